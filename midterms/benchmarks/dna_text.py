@@ -0,0 +1,55 @@
+"""
+Compares parsing and formatting DNA codes as text, one base at a time (how it used
+to be done), against the bulk routines and the binary form of `Dna`.
+
+    python benchmarks/dna_text.py --creatures 500 --genes 10
+"""
+from argparse import ArgumentParser
+from typing import List
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dna import Dna  # noqa: E402
+from gene import Gene  # noqa: E402
+from timing import report  # noqa: E402
+
+
+def legacy_parse(lines: List[str]) -> List[Dna]:
+    return [Dna.parse_dna([float(base) for base in line.split(',')]) for line in lines]
+
+
+def legacy_format(codes: List[np.ndarray]) -> List[str]:
+    return [','.join(str(base) for base in code) for code in codes]
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--creatures", type=int, default=500)
+    parser.add_argument("--genes", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    codes = [rng.random(Gene.length() * args.genes) for _ in range(args.creatures)]
+    dnas = [Dna.parse_dna(code) for code in codes]
+    lines = legacy_format(codes)
+    blobs = [dna.to_bytes() for dna in dnas]
+    print(f"{args.creatures} creatures, {args.genes} genes each")
+
+    baseline = report("parse, float() per base", lambda: legacy_parse(lines), args.repeat)
+    report("parse, Dna.parse_dna", lambda: [Dna.parse_dna(line) for line in lines], args.repeat, baseline)
+    report("parse, Dna.parse_many", lambda: Dna.parse_many(lines), args.repeat, baseline)
+    report("parse, Dna.from_bytes", lambda: [Dna.from_bytes(blob) for blob in blobs], args.repeat, baseline)
+
+    baseline = report("format, str() per base", lambda: legacy_format(codes), args.repeat)
+    report("format, Dna.format_code", lambda: [Dna.format_code(code) for code in codes], args.repeat, baseline)
+    report("format, Dna.to_bytes", lambda: [dna.to_bytes() for dna in dnas], args.repeat, baseline)
+
+
+if __name__ == "__main__":
+    main()
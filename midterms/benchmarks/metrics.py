@@ -0,0 +1,97 @@
+"""
+Compares computing the metrics of a generation with pandas over the records,
+re-parsing their DNA (how it used to be done), against `EvolutionMetrics`
+from the records and straight from the columns of the population.
+
+    python benchmarks/metrics.py --creatures 1000 --genes 10
+"""
+from argparse import ArgumentParser
+from typing import List
+
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.stats import entropy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from creature import Creature  # noqa: E402
+from dna import Dna  # noqa: E402
+from evolution import EvolutionMetrics, EvolutionRecord  # noqa: E402
+from gene import Gene  # noqa: E402
+from hyperparams import Hyperparams  # noqa: E402
+from population import Population  # noqa: E402
+from timing import report  # noqa: E402
+
+
+def legacy_from_records(records: List[EvolutionRecord], hyperparams: Hyperparams) -> EvolutionMetrics:
+    scores = [r.fitness_score for r in records if not r.is_elite_from_previous and not r.died_during_motion]
+    scores_df = pd.Series(scores)
+    dna_all = [Dna.parse_dna(r.dna_code) for r in records]
+    dna_unique = set([r.dna_code for r in records])
+    dna_pool = list(itertools.chain(*[dna.code for dna in dna_all]))
+    control_bases = list(itertools.chain(*[[gene.control_expression for gene in dna.genes] for dna in dna_all]))
+    return EvolutionMetrics(
+        fitness_mean=float(scores_df.mean()),
+        fitness_p95=float(scores_df.quantile(0.95)),
+        fitness_stdev=float(scores_df.std()),
+        fitness_lowest=float(scores_df.min()),
+        fitness_highest=float(scores_df.max()),
+        dna_count_all=len(dna_all),
+        dna_count_unique=len(dna_unique),
+        entropy_dna_pool=entropy(dna_pool),
+        entropy_fitness_scores=entropy(scores),
+        bases_not_in_genes=sum([len(dna.code) % Gene.length() for dna in dna_all]),
+        genes_total=sum([len(dna.genes) for dna in dna_all]),
+        genes_max=max([len(dna.genes) for dna in dna_all]),
+        genes_min=min([len(dna.genes) for dna in dna_all]),
+        genes_expressed=sum(1 for cb in control_bases if cb >= hyperparams.expression_threshold),
+        genes_supressed=sum(1 for cb in control_bases if cb < hyperparams.expression_threshold),
+        creatures_survived=len([r for r in records if not r.died_during_motion]),
+        creatures_dead=len([r for r in records if r.died_during_motion]))
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--creatures", type=int, default=1000)
+    parser.add_argument("--genes", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    hyperparams = Hyperparams(
+        crossover_min_len=0.25, crossover_max_len=0.75,
+        point_mutation_enabled=True, point_mutation_rate=0.25, point_mutation_amount=-0.15,
+        shrink_mutation_enabled=True, shrink_mutation_rate=0.1,
+        grow_mutation_enabled=True, grow_mutation_rate=0.15,
+        reproduction_max_attempts=100_000, elitist_behaviour=True, expression_threshold=0.1,
+        population_size=args.creatures, simulation_steps=2400, gene_count_genesis=args.genes, gene_count_max=18)
+    creatures: List[Creature] = []
+    while len(creatures) < args.creatures:
+        creature = Creature.develop_from(dna=Dna.parse_dna(rng.random(Gene.length() * args.genes + 3)), threshold_for_expression=0.1)
+        if creature:
+            creature.movement.track(tuple(rng.random(2).tolist()) + (5.,))
+            creature.movement.lethal_move = bool(rng.random() < 0.1)
+            creatures.append(creature)
+    population = Population(creatures)
+    is_elite_from_previous = [i == 0 for i in range(len(creatures))]
+    records = sorted([
+        EvolutionRecord.from_creature(creature, is_previous_fittest=is_elite)
+        for creature, is_elite
+        in zip(creatures, is_elite_from_previous)], key=lambda r: r.fitness_score, reverse=True)
+    print(f"{args.creatures} creatures, {args.genes} genes each")
+
+    expected = legacy_from_records(records, hyperparams)
+    assert expected == EvolutionMetrics.from_records(records, hyperparams)
+    assert expected == EvolutionMetrics.from_population(population, is_elite_from_previous, hyperparams)
+
+    baseline = report("pandas, parsing the records", lambda: legacy_from_records(records, hyperparams), args.repeat)
+    report("EvolutionMetrics.from_records", lambda: EvolutionMetrics.from_records(records, hyperparams), args.repeat, baseline)
+    report("EvolutionMetrics.from_population", lambda: EvolutionMetrics.from_population(population, is_elite_from_previous, hyperparams), args.repeat, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+Times the routines compared by the benchmarks, reporting the best of `repeat` runs.
+"""
+from typing import Callable, Optional
+
+import timeit
+
+
+def report(name: str, fn: Callable, repeat: int, baseline: Optional[float] = None, width: int = 40) -> float:
+    """
+    Prints how long the best run of `fn` took, and how many times faster it is than `baseline`.
+    """
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    speedup = f" ({baseline / best:.1f}x)" if baseline else ""
+    print(f"{name.ljust(width)} {best * 1000:9.2f} ms{speedup}")
+    return best
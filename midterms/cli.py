@@ -1,16 +1,17 @@
-from typing import Optional
-from argparse import ArgumentParser, Namespace
+from typing import Callable, Optional
+from argparse import ArgumentParser, ArgumentTypeError, BooleanOptionalAction, Namespace
 
 import shutil
-import random
-import numpy as np
 
 from hyperparams import Hyperparams
-from persistence import DnaRepository, EvolutionRepository, PersistenceSettings
+from persistence import DnaRepository, EvolutionRepository, PersistenceSettings, PersistenceWriter
 from population import Population
 from simulation import Simulation
 from primordial_soup import PrimordialSoup
 from evolution import EvolutionGeneration, Evolver
+from fitness_cache import FitnessCache
+from rng import RandomStreams
+from selection import SelectionStrategy
 
 import pybullet as p
 
@@ -36,7 +37,7 @@ def main():
 
 def action_new(args: Namespace):
     hyperparams = Hyperparams.from_args(args)
-    dna_code = PrimordialSoup.spark_life(args.gene_count)
+    dna_code = PrimordialSoup.spark_life(args.gene_count, rng=RandomStreams(hyperparams.seed).for_creature())
     repository = DnaRepository(settings=PersistenceSettings(folder=args.target_folder))
     repository.write(species=args.species, dna_code=dna_code, override=args.override_dna)
     if args.auto_load:
@@ -54,57 +55,90 @@ def action_render(args: Namespace):
 
 
 def action_evolve(args: Namespace, last_score: float = 0, default_gene_count: Optional[int] = 5) -> EvolutionGeneration:
-    persistence_settings = PersistenceSettings(folder=args.target_folder)
+    persistence_settings = PersistenceSettings(folder=args.target_folder, storage_format=args.storage_format)
     evolution_repository = EvolutionRepository(settings=persistence_settings)
     dna_repository = DnaRepository(settings=persistence_settings)
-    previous = None
+    previous_hyperparams = None
     genesis = None
     if args.gen_id is not None:
-        previous = evolution_repository.read(args.gen_id)
-        if previous:
-            genesis = previous.to_population()
-    genesis_gene_count = previous.hyperparams.gene_count_genesis if previous else default_gene_count
+        previous_hyperparams, genesis = evolution_repository.read_genesis(args.gen_id)
+    genesis_gene_count = previous_hyperparams.gene_count_genesis if previous_hyperparams else default_gene_count
     hyperparams = Hyperparams.from_args(args, genesis_gene_count)
-    evolver = Evolver(hyperparams)
+    fitness_cache = FitnessCache(hyperparams, folder=args.target_folder) if not args.disable_fitness_cache else None
+    evolver = Evolver(hyperparams, multi_threaded=args.multi_threaded, processes=args.processes, fitness_cache=fitness_cache, telemetry_folder=args.target_folder)
     evolving_id = 0 if args.gen_id is None else args.gen_id + 1
     generation = evolver.evolve(generation_id=evolving_id, previous=genesis)
-    if generation:
-        print(generation.metrics)
-        evolution_repository.write(generation)
-        if generation.elite_offspring:
-            dna_repository.write("summary", generation.elite_offspring.dna_code)
-            try:
-                if args.show_winner and last_score < generation.elite_offspring.fitness_score:
-                    with Simulation(connection_mode=p.GUI, hyperparams=hyperparams) as simulation:
-                        simulation.simulate(generation.elite_offspring.dna_code)
-            except Exception as _:
-                pass
-            except KeyboardInterrupt as _:
-                pass
+    if fitness_cache:
+        fitness_cache.close()
+    with PersistenceWriter(evolution_repository, dna_repository) as writer:
+        record_generation(args, generation, writer, last_score)
     return generation
 
 
 def action_optimise(args: Namespace):
-    persistence_settings = PersistenceSettings(folder=args.target_folder)
+    """
+    Evolves `n_generations` in a single process, carrying the simulated population
+    (and the simulation workers) from one generation to the next.
+    """
+    persistence_settings = PersistenceSettings(folder=args.target_folder, storage_format=args.storage_format)
     evolution_repository = EvolutionRepository(settings=persistence_settings)
     dna_repository = DnaRepository(settings=persistence_settings)
-    random.seed(0)
-    np.random.seed(0)
+    if args.seed is None:
+        args.seed = 0
     if args.gen_id is None:
         if not args.genesis_filepath or not args.genesis_filepath.is_file:
             raise FileNotFoundError(args.genesis_filepath)
         shutil.copy(args.genesis_filepath, args.target_folder / "generation-0000.gen")
         args.gen_id = 0
+    previous_hyperparams, population = evolution_repository.read_genesis(args.gen_id)
+    hyperparams = Hyperparams.from_args(args, previous_hyperparams.gene_count_genesis if previous_hyperparams else 5)
+    fitness_cache = FitnessCache(hyperparams, folder=args.target_folder) if not args.disable_fitness_cache else None
     last_score = 0.
-    evolutions = []
-    for _ in range(args.n_generations - 1):
-        generation = action_evolve(args, last_score)
-        if generation and generation.elite_offspring:
-            evolutions.append(generation)
-            last_score = max(last_score, generation.elite_offspring.fitness_score)
-        args.gen_id += 1
-    dna_repository.dedup("summary")
-    evolution_repository.summarise(evolutions)
+    summarised = evolution_repository.read_summary_tail()
+    if summarised:
+        LOGGER.info(f"Summary, resuming after generation {summarised['generation_id']}")
+    with Evolver(hyperparams, multi_threaded=args.multi_threaded, processes=args.processes, fitness_cache=fitness_cache, telemetry_folder=args.target_folder) as evolver, \
+            PersistenceWriter(evolution_repository, dna_repository) as writer:
+        for _ in range(args.n_generations - 1):
+            generation, population = evolver.evolve_population(generation_id=args.gen_id + 1, previous=population)
+            record_generation(args, generation, writer, last_score, unique_dna=True)
+            if generation and generation.elite_offspring:
+                last_score = max(last_score, generation.elite_offspring.fitness_score)
+            args.gen_id += 1
+    if fitness_cache:
+        fitness_cache.close()
+
+
+def record_generation(
+        args: Namespace,
+        generation: Optional[EvolutionGeneration],
+        writer: PersistenceWriter,
+        last_score: float,
+        unique_dna: bool = False):
+    if generation:
+        print(generation.metrics)
+        writer.write_generation(generation)
+        if generation.elite_offspring:
+            writer.write_summary(generation)
+            writer.write_dna("summary", generation.elite_offspring.dna_code, unique=unique_dna)
+            try:
+                if args.show_winner and last_score < generation.elite_offspring.fitness_score:
+                    with Simulation(connection_mode=p.GUI, hyperparams=generation.hyperparams) as simulation:
+                        simulation.simulate(generation.elite_offspring.dna_code)
+            except Exception as _:
+                pass
+            except KeyboardInterrupt as _:
+                pass
+
+
+def int_at_least(minimum: int) -> Callable[[str], int]:
+    def parse(value: str) -> int:
+        number = int(value)
+        if number < minimum:
+            raise ArgumentTypeError(f"must be at least {minimum}, got {number}")
+        return number
+    parse.__name__ = "int"
+    return parse
 
 
 def collect_args() -> Namespace:
@@ -143,6 +177,11 @@ def collect_args() -> Namespace:
         parser_evo_parser.add_argument("--show_winner", action="store_true", help="Do you want to run the simulation as a multi-threaded process?")
         parser_evo_parser.add_argument("--target_folder", type=dir_path, default="./evolution", help="Which directory will keep record of the evolution?")
         parser_evo_parser.add_argument("--multi_threaded", action="store_true", help="Do you want to run the simulation as a multi-threaded process?")
+        parser_evo_parser.add_argument("--processes", type=int, help="How many worker processes should run the simulation? (defaults to the number of CPU cores)")
+        parser_evo_parser.add_argument(
+            "--storage_format", type=str, default="json", choices=PersistenceSettings.storage_formats(),
+            help="How should generations be stored? (`npz` is compact and faster to load, either is read when the other is missing)")
+        parser_evo_parser.add_argument("--disable_fitness_cache", action="store_true", help="Do you want to stop reusing the fitness of DNA simulated in previous generations?")
 
     for parser_hyperparam in parser_evo_optimise, parser_evo_evolve, parser_creature_new, parser_creature_render:
         parser_hyperparam.add_argument("--gene_count_genesis", type=int, default=5)
@@ -161,9 +200,45 @@ def collect_args() -> Namespace:
         parser_hyperparam.add_argument("--expression_threshold", type=float, default=0.1)
         parser_hyperparam.add_argument("--population_size", type=int, default=100)
         parser_hyperparam.add_argument("--simulation_steps", type=int, default=2400)
+        parser_hyperparam.add_argument("--simulation_timestep", type=float, default=1. / 240)
+        parser_hyperparam.add_argument("--simulation_substeps", type=int_at_least(1), default=1)
+        parser_hyperparam.add_argument("--simulation_motor_interval", type=int_at_least(1), default=1, help="Every how many physics steps should the motors be updated?")
+        parser_hyperparam.add_argument(
+            "--simulation_tracking_interval", type=int_at_least(1), default=1,
+            help="Every how many physics steps should the position be sampled? (moving faster than allowed per step between samples is lethal)")
+        parser_hyperparam.add_argument(
+            "--simulation_stop_on_lethal", action=BooleanOptionalAction, default=True,
+            help="Should the simulation stop as soon as the creature makes a lethal move?")
+        parser_hyperparam.add_argument(
+            "--simulation_stall_steps", type=int_at_least(0), default=0,
+            help="Stop simulating creatures that have not moved for this many steps (0 disables it)")
+        parser_hyperparam.add_argument("--simulation_stall_epsilon", type=float, default=0.001, help="The smallest distance that counts as moving for `--simulation_stall_steps`")
+        parser_hyperparam.add_argument("--simulation_stop_hopeless", action="store_true", help="Stop simulating creatures that can no longer catch up with the elite")
+        parser_hyperparam.add_argument("--simulation_batch_size", type=int_at_least(1), default=1, help="How many creatures should be simulated together in the same world?")
+        parser_hyperparam.add_argument(
+            "--simulation_restore_state", action=BooleanOptionalAction, default=True,
+            help="Should the empty world be restored from a snapshot between simulations?")
+        parser_hyperparam.add_argument(
+            "--simulation_telemetry_interval", type=int_at_least(0), default=0,
+            help="Every how many physics steps should the base and joints be recorded into `telemetry-*.npz`? "
+                 "(0 disables it; while on, the fitness cache is not used, so every creature is simulated and recorded)")
+        parser_hyperparam.add_argument(
+            "--simulation_telemetry_samples", type=int_at_least(1), default=1000,
+            help="How many telemetry samples are kept per creature? (the most recent ones)")
+        parser_hyperparam.add_argument("--seed", type=int, help="Seed for every random number drawn, so the run can be reproduced (optimise defaults to 0)")
+        parser_hyperparam.add_argument(
+            "--selection_strategy", type=str, default="roulette", choices=SelectionStrategy.names(),
+            help="How should parents be selected for reproduction?")
+        parser_hyperparam.add_argument(
+            "--selection_tournament_size", type=int_at_least(1), default=3,
+            help="How many creatures compete in each tournament? (`--selection_strategy tournament`)")
+        parser_hyperparam.add_argument(
+            "--selection_truncation_ratio", type=float, default=0.5,
+            help="What fraction of the fittest creatures can be selected? (`--selection_strategy truncation`)")
 
     args = parser.parse_args()
     return args
 
 
-main()
+if __name__ == "__main__":
+    main()
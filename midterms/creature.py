@@ -8,10 +8,11 @@ import uuid
 import numpy as np
 
 from dna import Dna
-from phenotype import Phenotype
+from gene import Gene
+from phenotype import Phenotype, PhenotypeColumns
 
 
-@dataclass(eq=True, frozen=True, order=True, unsafe_hash=False)
+@dataclass(eq=True, frozen=True, unsafe_hash=False)
 class Creature:
     """
     Represents a living organism or robot who has a DNA (genetic code)
@@ -37,11 +38,35 @@ class Creature:
         else:
             return None
 
+    @staticmethod
+    def develop_all(dnas: List[Dna], threshold_for_expression: float) -> List[Optional["Creature"]]:
+        """
+        Develops the creature of each DNA, decoding the genes of all of them at once.
+        Returns None in place of the DNA that expressed no phenotype, as `develop_from` does.
+        """
+        if not dnas:
+            return []
+        stacked = np.concatenate([dna.matrix for dna in dnas])
+        owners = np.repeat(np.arange(len(dnas)), [len(dna.matrix) for dna in dnas])
+        expressed = stacked[:, Gene.CONTROL_EXPRESSION] >= threshold_for_expression
+        expressed_counts = np.bincount(owners[expressed], minlength=len(dnas))
+        first_expressed = np.cumsum(expressed_counts) - expressed_counts
+        joint_counts = np.arange(expressed_counts.sum()) - np.repeat(first_expressed, expressed_counts) + 1
+        phenotypes = PhenotypeColumns.decode(stacked[expressed], joint_counts=joint_counts).to_phenotypes()
+        creatures: List[Optional[Creature]] = []
+        for dna, first, count in zip(dnas, first_expressed.tolist(), expressed_counts.tolist()):
+            if count:
+                own_phenotypes = phenotypes[first:first + count]
+                creatures.append(Creature(dna=dna, phenotypes=own_phenotypes, body=CreaturePart.part_hierarchy_from(own_phenotypes)))
+            else:
+                creatures.append(None)
+        return creatures
+
     def __hash__(self) -> int:
         return self._unique_id
 
 
-@dataclass(eq=True, frozen=True, order=True)
+@dataclass(eq=True, frozen=True)
 class CreaturePart:
     """
     Represents a part of the body of the creature, linking
@@ -62,8 +87,18 @@ class CreaturePart:
                 for child_i
                 in child_phenotype_indexes])
 
+    def flatten(self) -> List["CreaturePart"]:
+        """
+        Lists this part and all its descendants depth-first,
+        which is the order in which links are built into the simulation.
+        """
+        parts = [self]
+        for child in self.children:
+            parts.extend(child.flatten())
+        return parts
 
-@dataclass(eq=True, frozen=False, order=True)
+
+@dataclass(eq=True, frozen=False)
 class CreatureMovement:
     """
     Keeps track of the initial and last position,
@@ -84,10 +119,22 @@ class CreatureMovement:
         self.lethal_move = False
         return initial
 
-    def track(self, position: Tuple[float, float, float]):
+    def restore(self, other: "CreatureMovement"):
+        """
+        Copies the tracking of a movement simulated elsewhere
+        (e.g.: in a worker process) into this instance.
+        """
+        self.initial = other.initial
+        self.last = other.last
+        self.lethal_move = other.lethal_move
+
+    def track(self, position: Tuple[float, float, float], steps: int = 1):
+        """
+        :param steps {int}: how many physics steps went by since the previous position was tracked.
+        """
         if position:
             last_or_initial = self.last if self.last else self.initial
-            self.lethal_move = self.lethal_move if self.lethal_move else CreatureMovement.check_lethality(last_or_initial, position)
+            self.lethal_move = self.lethal_move if self.lethal_move else CreatureMovement.check_lethality(last_or_initial, position, steps=steps)
             self.last = position
 
     @property
@@ -102,10 +149,17 @@ class CreatureMovement:
         return 0., 0., 5.
 
     @staticmethod
-    def check_lethality(prev, now):
+    def max_move() -> float:
+        """
+        The furthest a creature may move in a single physics step without dying.
+        """
+        return 0.75
+
+    @staticmethod
+    def check_lethality(prev, now, steps: int = 1):
         if now[2] > 5.5:
             return True # went too high
-        elif CreatureMovement.calculate_dist(prev, now) > 0.75:
+        elif CreatureMovement.calculate_dist(prev, now) > CreatureMovement.max_move() * steps:
             return True # moved too quickly
         return False
 
@@ -0,0 +1,98 @@
+from typing import List
+
+import numpy as np
+import pybullet as p
+
+from creature import Creature, CreaturePart
+from phenotype import Phenotype, PhenotypeLinkShape, PhenotypeJointType
+
+
+class CreatureBuilder:
+    """
+    Responsible for building the creature straight into the physics engine,
+    from its tree of body parts, without round-tripping an URDF file through disk.
+    It mirrors what `CreatureRenderer` describes in URDF.
+    """
+    creature: Creature
+    pid: int
+    with_visuals: bool
+
+    def __init__(self, creature: Creature, pid: int, with_visuals: bool = False) -> None:
+        assert creature
+        self.creature = creature
+        self.pid = pid
+        self.with_visuals = with_visuals
+
+    def build(self) -> int:
+        """
+        Creates the multibody for the creature, returning its id in the simulation.
+        Links are laid out depth-first, which is the same order `CreatureRenderer` uses.
+        """
+        base, *links = self.parts_in_link_order()
+        link_parents = self._link_parents()
+        return p.createMultiBody(
+            baseMass=self._mass(base.phenotype),
+            baseCollisionShapeIndex=self._collision_shape(base.phenotype),
+            baseVisualShapeIndex=self._visual_shape(base.phenotype),
+            linkMasses=[self._mass(part.phenotype) for part in links],
+            linkCollisionShapeIndices=[self._collision_shape(part.phenotype) for part in links],
+            linkVisualShapeIndices=[self._visual_shape(part.phenotype) for part in links],
+            linkPositions=[self._joint_origin_xyz(part.phenotype) for part in links],
+            linkOrientations=[self._joint_origin_orientation(part.phenotype) for part in links],
+            linkInertialFramePositions=[[0, 0, 0] for _ in links],
+            linkInertialFrameOrientations=[[0, 0, 0, 1] for _ in links],
+            linkParentIndices=link_parents,
+            linkJointTypes=[self._joint_type(part.phenotype) for part in links],
+            linkJointAxis=[self._joint_axis(part.phenotype) for part in links],
+            physicsClientId=self.pid)
+
+    def parts_in_link_order(self) -> List[CreaturePart]:
+        return self.creature.body.flatten()
+
+    def _link_parents(self) -> List[int]:
+        # pybullet refers to the base as 0 and to the link `i` as `i+1`
+        parents: List[int] = []
+        CreatureBuilder._collect_parents(self.creature.body, part_index=0, parents=parents)
+        return parents
+
+    @staticmethod
+    def _collect_parents(part: CreaturePart, part_index: int, parents: List[int]) -> int:
+        next_index = part_index + 1
+        for child in part.children:
+            parents.append(part_index)
+            next_index = CreatureBuilder._collect_parents(child, part_index=next_index, parents=parents)
+        return next_index
+
+    def _collision_shape(self, phenotype: Phenotype) -> int:
+        if phenotype.link_shape == PhenotypeLinkShape.CYLINDER:
+            return p.createCollisionShape(p.GEOM_CYLINDER, radius=phenotype.link_radius, height=phenotype.link_length, physicsClientId=self.pid)
+        return p.createCollisionShape(p.GEOM_SPHERE, radius=phenotype.link_radius, physicsClientId=self.pid)
+
+    def _visual_shape(self, phenotype: Phenotype) -> int:
+        if not self.with_visuals:
+            return -1
+        if phenotype.link_shape == PhenotypeLinkShape.CYLINDER:
+            return p.createVisualShape(p.GEOM_CYLINDER, radius=phenotype.link_radius, length=phenotype.link_length, physicsClientId=self.pid)
+        return p.createVisualShape(p.GEOM_SPHERE, radius=phenotype.link_radius, physicsClientId=self.pid)
+
+    @staticmethod
+    def _mass(phenotype: Phenotype) -> float:
+        return float(np.pi * (phenotype.link_radius * phenotype.link_radius) * phenotype.link_length)
+
+    @staticmethod
+    def _joint_type(phenotype: Phenotype) -> int:
+        return p.JOINT_REVOLUTE if phenotype.joint_type == PhenotypeJointType.REVOLUTE else p.JOINT_FIXED
+
+    @staticmethod
+    def _joint_axis(phenotype: Phenotype) -> List[int]:
+        axis = phenotype.joint_axis_xyz
+        return [axis.x, axis.y, axis.z]
+
+    @staticmethod
+    def _joint_origin_xyz(phenotype: Phenotype) -> List[float]:
+        return [phenotype.joint_origin_xyz_x, phenotype.joint_origin_xyz_y, phenotype.joint_origin_xyz_z]
+
+    @staticmethod
+    def _joint_origin_orientation(phenotype: Phenotype) -> List[float]:
+        rpy = [phenotype.joint_origin_rpy_r, phenotype.joint_origin_rpy_p, phenotype.joint_origin_rpy_y]
+        return list(p.getQuaternionFromEuler(rpy))
@@ -1,63 +1,136 @@
 from dataclasses import dataclass
-from typing import List, Union
+from typing import Iterable, List, Union
 
-from phenotype import Phenotype
+import numpy as np
+
+from phenotype import Phenotype, PhenotypeColumns
 from gene import Gene
 
 
-@dataclass(eq=True, frozen=True, order=True)
+@dataclass(eq=False, frozen=True)
 class Dna:
     """
     Holds the genetic code, and the information about
     Feature Genes (that may be expressed as phenotypes) and
     Control Genes (that will allow/disallow Feature genes to be expressed).
+    The code is a read-only array, and genes are views over its rows of 18 bases.
     """
-    code: List[float]
+    code: np.ndarray
     genes: List[Gene]
 
+    BINARY_DTYPE = np.dtype('<f8')
+
     @staticmethod
-    def parse_dna(data: Union[str, List[float]]) -> "Dna":
+    def parse_dna(data: Union[str, List[float], np.ndarray]) -> "Dna":
         """
         Reads the DNA code and reads its available Gene,
         finally producing an instance of Dna.
         """
-        assert data
-        assert isinstance(data, str) or (isinstance(data, List) and isinstance(data[0], float))
-        assert not isinstance(data, str) or len(data.split(',')) >= Gene.length()
-        assert not isinstance(data, List) or len(data) >= Gene.length()
-        dna_code = Dna._read_dna_code_from(data) if isinstance(data, str) else data
-        genes = Dna._read_genes_from(dna_code)
-        return Dna(code=dna_code, genes=genes)
+        assert data is not None and len(data) > 0
+        assert isinstance(data, str) or (isinstance(data, (List, np.ndarray)) and isinstance(data[0], float))
+        dna_code = Dna.parse_code(data) if isinstance(data, str) else np.array(data, dtype=np.float64)
+        return Dna._from_code(dna_code)
+
+    @staticmethod
+    def parse_many(lines: Iterable[str]) -> List["Dna"]:
+        """
+        Parses many DNA codes (e.g.: the lines of a DNA file) with a single pass
+        over all of their text, the result being the same as parsing each of them.
+        """
+        lines = [line.strip() for line in lines]
+        if not lines:
+            return []
+        lengths = [line.count(',') + 1 for line in lines]
+        bases = Dna._parse_bases(','.join(lines))
+        return Dna._split(bases, np.concatenate([[0], np.cumsum(lengths)]))
+
+    @staticmethod
+    def split_many(bases: np.ndarray, offsets: np.ndarray) -> List["Dna"]:
+        """
+        The DNA of many creatures laid out one after the other in `bases`, split by `offsets`
+        (e.g.: a stored generation), copying the bases only once for all of them.
+        """
+        return Dna._split(np.array(bases, dtype=np.float64), offsets)
+
+    @staticmethod
+    def parse_code(data: str) -> np.ndarray:
+        return Dna._parse_bases(data.strip())
 
     @staticmethod
-    def _read_dna_code_from(data: str) -> List[float]:
-        return [float(gene) for gene in data.split(',')]
+    def format_code(code: Union[List[float], np.ndarray]) -> str:
+        """
+        Formats the code as comma separated bases, each with the shortest
+        representation that parses back to the exact same float.
+        """
+        return ','.join(map(repr, np.asarray(code, dtype=np.float64).tolist()))
 
     @staticmethod
-    def _read_genes_from(dna_code: List[float]) -> List[Gene]:
-        genes: List[Gene] = []
-        for i in range(0, len(dna_code), Gene.length()):
-            dna_segment = dna_code[i:i+Gene.length()]
-            if len(dna_segment) >= Gene.length():
-                genes.append(Gene.create_from(code=dna_segment))
-        return genes
+    def from_bytes(data: bytes) -> "Dna":
+        return Dna._from_code(np.frombuffer(data, dtype=Dna.BINARY_DTYPE).astype(np.float64))
+
+    def to_bytes(self) -> bytes:
+        """
+        The code as little-endian float64, which is 8 bytes per base and parses back exactly.
+        """
+        return self.code.astype(Dna.BINARY_DTYPE, copy=False).tobytes()
+
+    @staticmethod
+    def _parse_bases(data: str) -> np.ndarray:
+        try:
+            return np.array(data.split(','), dtype=np.float64)
+        except ValueError as e:
+            raise ValueError(f"Malformed DNA code: {data[:100]}") from e
+
+    @staticmethod
+    def _split(bases: np.ndarray, offsets: np.ndarray) -> List["Dna"]:
+        offsets = np.asarray(offsets).tolist()
+        return [Dna._from_code(bases[start:end]) for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @staticmethod
+    def _from_code(dna_code: np.ndarray) -> "Dna":
+        assert len(dna_code) >= Gene.length()
+        dna_code.flags.writeable = False
+        return Dna(code=dna_code, genes=Dna._read_genes_from(dna_code))
+
+    @staticmethod
+    def _read_genes_from(dna_code: np.ndarray) -> List[Gene]:
+        return [Gene(code=row) for row in Dna._matrix_of(dna_code)]
+
+    @staticmethod
+    def _matrix_of(dna_code: np.ndarray) -> np.ndarray:
+        # trailing bases that do not make a whole gene are left out
+        gene_count = len(dna_code) // Gene.length()
+        return dna_code[:gene_count * Gene.length()].reshape((gene_count, Gene.length()))
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        The genes as rows of a `(gene_count, 18)` view over the code, without copying it.
+        """
+        return Dna._matrix_of(self.code)
+
+    def column(self, index: int) -> np.ndarray:
+        """
+        The same base of every gene, indexed by the `Gene.*` column constants.
+        """
+        return self.matrix[:, index]
 
     def express(self, threshold_for_expression: float) -> List[Phenotype]:
         """
         Expresses feature genes allowed by control genes.
         Suppressed feature genes may still be carried forward by elite Creatures.
         """
-        expressed: List[Gene] = []
-        for gene in self.genes:
-            if gene.control_expression >= threshold_for_expression:
-                expressed.append(gene)
-        return [
-            Phenotype.parse_dna(gene=gene, joint_count=i+1)
-            for i, gene
-            in enumerate(expressed)]
+        expressed = self.matrix[self.column(Gene.CONTROL_EXPRESSION) >= threshold_for_expression]
+        return PhenotypeColumns.decode(expressed, joint_counts=np.arange(len(expressed)) + 1).to_phenotypes()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Dna) and np.array_equal(self.code, other.code)
+
+    def __hash__(self) -> int:
+        return hash(self.code.tobytes())
 
     def __str__(self) -> str:
-        return ','.join(str(b) for b in self.code)
+        return Dna.format_code(self.code)
 
     def __repr__(self) -> str:
         return str(self)
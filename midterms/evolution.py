@@ -1,10 +1,11 @@
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional
+from typing import List, Sequence, Tuple, Optional, Union
 
-import itertools
+from contextlib import ExitStack
+from pathlib import Path
 
+import numpy as np
 import pybullet as p
-import pandas as pd
 from tqdm import tqdm
 from scipy.stats import entropy
 
@@ -14,7 +15,11 @@ from dna import Dna
 from creature import Creature
 from population import Population
 from reproduction import Reproduction
-from simulation import Simulation
+from simulation import Simulation, SimulationPool
+from fitness_cache import FitnessCache
+from rng import GenerationStreams, RandomStreams
+from selection import SelectionStrategy
+from telemetry import TelemetryTrace
 
 
 class Evolver:
@@ -25,9 +30,45 @@ class Evolver:
     generating a new population and finally returning the fitness map for the offspring.
     """
     hyperparams: Hyperparams
+    multi_threaded: bool
+    processes: Optional[int]
+    fitness_cache: Optional[FitnessCache]
+    random_streams: RandomStreams
+    selection: SelectionStrategy
+    simulation: Optional[Union[Simulation, SimulationPool]]
+    telemetry_folder: Optional[Path]
 
-    def __init__(self, hyperparams: Hyperparams):
+    def __init__(
+            self,
+            hyperparams: Hyperparams,
+            multi_threaded: bool = False,
+            processes: Optional[int] = None,
+            fitness_cache: Optional[FitnessCache] = None,
+            random_streams: Optional[RandomStreams] = None,
+            telemetry_folder: Optional[Path] = None):
+        """
+        :param telemetry_folder {Path}: where to save the telemetry of each generation, when `simulation_telemetry_interval` is set.
+        """
         self.hyperparams = hyperparams
+        self.multi_threaded = multi_threaded
+        self.processes = processes
+        self.fitness_cache = fitness_cache
+        self.random_streams = random_streams or RandomStreams(hyperparams.seed)
+        self.selection = SelectionStrategy.from_hyperparams(hyperparams)
+        self.telemetry_folder = telemetry_folder
+        self.simulation = None
+        self._exit_stack = ExitStack()
+
+    def __enter__(self):
+        """
+        Keeps the simulation (and its workers) open across generations, until exiting.
+        """
+        self.simulation = self._exit_stack.enter_context(self._open_simulation())
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.simulation = None
+        return self._exit_stack.__exit__(type, value, traceback)
 
     def evolve(
             self,
@@ -38,35 +79,81 @@ class Evolver:
         :param generation_id {int}: the unique identifier of the generation, used for record keeping
         :param previous_population {Population}: if we are seeding the original population from persistence, uses that instead of generating a random one.
         """
-        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
-            previous_fittest = previous.fittest if previous else None
-            genesis = self._ensure_previous_population(previous)
-            offspring = self._reproduce_into_offspring_population(genesis, elitist=self.hyperparams.elitist_behaviour)
-            for creature in tqdm(offspring.creatures, desc=f"gen #{str(generation_id).rjust(3, '0')}"):
-                simulation.simulate(creature, steps=self.hyperparams.simulation_steps)
-            offspring_fittest = offspring.fittest if offspring else None
-            offspring_fitness = sorted([
-                EvolutionRecord.from_creature(creature, is_previous_fittest=(creature == previous_fittest))
-                for creature
-                in offspring.creatures], key=lambda r: r.fitness_score, reverse=True)
-            return EvolutionGeneration(
-                generation_id=generation_id,
-                hyperparams=self.hyperparams,
-                metrics=EvolutionMetrics.from_records(offspring_fitness, hyperparams=self.hyperparams),
-                elite_previous=EvolutionRecord.from_creature(previous_fittest, is_previous_fittest=True) if previous_fittest else None,
-                elite_offspring=EvolutionRecord.from_creature(offspring_fittest, is_previous_fittest=False) if offspring_fittest else None,
-                offspring_fitness=offspring_fitness)
-
-    def _ensure_previous_population(self, population: Optional[Population]) -> Population:
+        generation, _ = self.evolve_population(generation_id, previous)
+        return generation
+
+    def evolve_population(
+            self,
+            generation_id: int,
+            previous: Optional[Population] = None) -> Tuple["EvolutionGeneration", Population]:
+        """
+        Runs the next generation of evolution, also returning the simulated offspring,
+        which can be evolved further without going through persistence.
+        """
+        if self.simulation is None:
+            with self:
+                return self.evolve_population(generation_id, previous)
+        streams = self.random_streams.for_generation(generation_id)
+        previous_fittest = previous.fittest if previous else None
+        genesis = self._ensure_previous_population(previous, streams)
+        offspring = self._reproduce_into_offspring_population(genesis, elitist=self.hyperparams.elitist_behaviour, streams=streams)
+        pending = self._restore_cached_fitness(offspring.creatures)
+        simulated = self.simulation.simulate_all(
+            pending,
+            steps=self.hyperparams.simulation_steps,
+            target_distance=previous_fittest.movement.distance if previous_fittest else None)
+        for creature in tqdm(simulated, total=len(pending), desc=f"gen #{str(generation_id).rjust(3, '0')}"):
+            if self.fitness_cache:
+                self.fitness_cache.store(creature)
+        self._save_telemetry(generation_id)
+        offspring.refresh()
+        offspring_fittest = offspring.fittest if offspring else None
+        is_elite_from_previous = [creature == previous_fittest for creature in offspring.creatures]
+        offspring_fitness = sorted([
+            EvolutionRecord.from_creature(creature, is_previous_fittest=is_previous_fittest)
+            for creature, is_previous_fittest
+            in zip(offspring.creatures, is_elite_from_previous)], key=lambda r: r.fitness_score, reverse=True)
+        generation = EvolutionGeneration(
+            generation_id=generation_id,
+            hyperparams=self.hyperparams,
+            metrics=EvolutionMetrics.from_population(offspring, is_elite_from_previous, hyperparams=self.hyperparams),
+            elite_previous=EvolutionRecord.from_creature(previous_fittest, is_previous_fittest=True) if previous_fittest else None,
+            elite_offspring=EvolutionRecord.from_creature(offspring_fittest, is_previous_fittest=False) if offspring_fittest else None,
+            offspring_fitness=offspring_fitness)
+        return generation, offspring
+
+    def _open_simulation(self) -> Union[Simulation, SimulationPool]:
+        if self.multi_threaded:
+            return SimulationPool(hyperparams=self.hyperparams, processes=self.processes)
+        return Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams)
+
+    def _save_telemetry(self, generation_id: int):
+        if self.simulation is None:
+            return
+        telemetry = self.simulation.drain_telemetry()
+        if telemetry and self.telemetry_folder:
+            TelemetryTrace.save_all(self.telemetry_folder / f"telemetry-{str(generation_id).rjust(4, '0')}.npz", telemetry)
+
+    def _restore_cached_fitness(self, creatures: List[Creature]) -> List[Creature]:
+        """
+        Restores the movement of creatures whose DNA was already simulated,
+        returning only those that still need to be simulated.
+        """
+        if not self.fitness_cache:
+            return creatures
+        return [creature for creature in creatures if not self.fitness_cache.restore(creature)]
+
+    def _ensure_previous_population(self, population: Optional[Population], streams: GenerationStreams) -> Population:
         if not population:
             population = Population.populate_for(
                 size=2,
                 gene_count=self.hyperparams.gene_count_genesis,
-                threshold_for_expression=self.hyperparams.expression_threshold)
+                threshold_for_expression=self.hyperparams.expression_threshold,
+                rng=streams.genesis)
         return population
 
-    def _reproduce_into_offspring_population(self, previous: Population, elitist: bool) -> Population:
-        reproduction = Reproduction(self.hyperparams)
+    def _reproduce_into_offspring_population(self, previous: Population, elitist: bool, streams: GenerationStreams) -> Population:
+        reproduction = Reproduction(self.hyperparams, rng=streams.reproduction)
         viable_creatures: List[Creature] = []
         creatures_without_previous_elite: List[Creature] = []
         if elitist:
@@ -74,10 +161,13 @@ class Evolver:
             if fittest and not fittest.movement.lethal_move:
                 viable_creatures.append(fittest)
         while len(viable_creatures) < self.hyperparams.population_size:
-            adam, eve = previous.next_roulette_pair()
-            if adam and eve:
-                new = reproduction.reproduce(adam.dna.code, eve.dna.code)
-                child = Creature.develop_from(dna=Dna.parse_dna(new), threshold_for_expression=self.hyperparams.expression_threshold)
+            missing = self.hyperparams.population_size - len(viable_creatures)
+            pairs = previous.sample_pairs(missing, streams.selection, strategy=self.selection)
+            parents = [(previous.creatures[adam].dna.code, previous.creatures[eve].dna.code) for adam, eve in pairs]
+            children = Creature.develop_all(
+                [Dna.parse_dna(new) for new in reproduction.reproduce_all(parents)],
+                threshold_for_expression=self.hyperparams.expression_threshold)
+            for child in children:
                 if child:
                     creatures_without_previous_elite.append(child)
                     viable_creatures.append(child)
@@ -102,17 +192,31 @@ class EvolutionGeneration:
         Turns the offpsring information into a population that can be used
         as parents of a new offspring.
         """
+        records = self.offspring_fitness or []
+        return EvolutionGeneration.develop_population(
+            Dna.parse_many([r.dna_code for r in records]),
+            last_positions=[r.extract_last_position_as_tuple() for r in records],
+            died_during_motion=[r.died_during_motion for r in records],
+            threshold_for_expression=self.hyperparams.expression_threshold)
+
+    @staticmethod
+    def develop_population(
+            dnas: List[Dna],
+            last_positions: List[Tuple[float, float, float]],
+            died_during_motion: List[bool],
+            threshold_for_expression: float) -> Population:
+        """
+        Develops the creatures of the offspring back where they were left,
+        keeping the ones that survived.
+        """
         creatures: List[Creature] = []
-        if self.offspring_fitness:
-            for fitness in self.offspring_fitness:
-                creature = Creature.develop_from(
-                    dna=Dna.parse_dna(fitness.dna_code),
-                    threshold_for_expression=self.hyperparams.expression_threshold)
-                if creature:
-                    creature.movement.track(fitness.extract_last_position_as_tuple())
-                    creature.movement.lethal_move = fitness.died_during_motion
-                    if not creature.movement.lethal_move:
-                        creatures.append(creature)
+        developed = Creature.develop_all(dnas, threshold_for_expression=threshold_for_expression)
+        for creature, last_position, lethal_move in zip(developed, last_positions, died_during_motion):
+            if creature:
+                creature.movement.track(last_position)
+                creature.movement.lethal_move = lethal_move
+                if not creature.movement.lethal_move:
+                    creatures.append(creature)
         return Population(creatures)
 
 
@@ -138,30 +242,74 @@ class EvolutionMetrics:
 
     @staticmethod
     def from_records(records: List["EvolutionRecord"], hyperparams: Hyperparams) -> "EvolutionMetrics":
-        scores = [r.fitness_score for r in records if not r.is_elite_from_previous and not r.died_during_motion]
-        scores_df = pd.DataFrame(scores)
-        dna_all = [Dna.parse_dna(r.dna_code) for r in records]
-        dna_unique = [Dna.parse_dna(code) for code in set([r.dna_code for r in records])]
-        dna_pool = list(itertools.chain(*[dna.code for dna in dna_all]))
-        control_bases = list(itertools.chain(*[[gene.control_expression for gene in dna.genes] for dna in dna_all]))
+        dna_codes = [Dna.parse_code(r.dna_code) for r in records]
+        return EvolutionMetrics.from_columns(
+            fitness=np.array([r.fitness_score for r in records], dtype=np.float64),
+            lethal=np.array([r.died_during_motion for r in records], dtype=bool),
+            is_elite_from_previous=np.array([r.is_elite_from_previous for r in records], dtype=bool),
+            dna_bases=np.concatenate(dna_codes) if dna_codes else np.empty(0, dtype=np.float64),
+            dna_offsets=np.concatenate([[0], np.cumsum([len(code) for code in dna_codes], dtype=np.int64)]),
+            hyperparams=hyperparams)
+
+    @staticmethod
+    def from_population(population: Population, is_elite_from_previous: Sequence[bool], hyperparams: Hyperparams) -> "EvolutionMetrics":
+        """
+        Same as `from_records` for the records of the creatures (sorted by fitness),
+        straight from the columns of the population, without going through the DNA text.
+        """
+        columns = population.columns
+        order = np.argsort(-columns.fitness, kind="stable")
+        lengths = np.diff(columns.dna_offsets)[order]
+        starts = columns.dna_offsets[:-1][order]
+        # the bases of every creature, laid out in the order of the records
+        positions = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+        return EvolutionMetrics.from_columns(
+            fitness=columns.fitness[order],
+            lethal=columns.lethal[order],
+            is_elite_from_previous=np.asarray(is_elite_from_previous, dtype=bool)[order],
+            dna_bases=columns.dna_bases[positions],
+            dna_offsets=np.concatenate([[0], np.cumsum(lengths)]),
+            hyperparams=hyperparams)
+
+    @staticmethod
+    def from_columns(
+            fitness: np.ndarray,
+            lethal: np.ndarray,
+            is_elite_from_previous: np.ndarray,
+            dna_bases: np.ndarray,
+            dna_offsets: np.ndarray,
+            hyperparams: Hyperparams) -> "EvolutionMetrics":
+        """
+        Computes the metrics from one entry per creature, with the DNA of all of them
+        laid out in `dna_bases` and split by `dna_offsets`. Statistics of no scores are `nan`.
+        """
+        scores = fitness[~is_elite_from_previous & ~lethal]
+        lengths = np.diff(dna_offsets)
+        gene_counts = lengths // Gene.length()
+        # the control base of every whole gene, skipping the bases not in genes
+        gene_starts = np.repeat(dna_offsets[:-1] - np.concatenate([[0], np.cumsum(gene_counts)[:-1]]) * Gene.length(), gene_counts) \
+            + np.arange(gene_counts.sum()) * Gene.length()
+        control_bases = dna_bases[gene_starts + Gene.CONTROL_EXPRESSION]
+        dna_unique = set(dna_bases[start:end].tobytes() for start, end in zip(dna_offsets[:-1].tolist(), dna_offsets[1:].tolist()))
+        genes_expressed = int(np.count_nonzero(control_bases >= hyperparams.expression_threshold))
         return EvolutionMetrics(
-            fitness_mean=float(scores_df.mean()),
-            fitness_p95=float(scores_df.quantile(0.95)),
-            fitness_stdev=float(scores_df.std()),
-            fitness_lowest=float(scores_df.min()),
-            fitness_highest=float(scores_df.max()),
-            dna_count_all=len(dna_all),
+            fitness_mean=float(scores.mean()) if len(scores) else float('nan'),
+            fitness_p95=float(np.quantile(scores, 0.95, method="linear")) if len(scores) else float('nan'),
+            fitness_stdev=float(scores.std(ddof=1)) if len(scores) > 1 else float('nan'),
+            fitness_lowest=float(scores.min()) if len(scores) else float('nan'),
+            fitness_highest=float(scores.max()) if len(scores) else float('nan'),
+            dna_count_all=len(lengths),
             dna_count_unique=len(dna_unique),
-            entropy_dna_pool=entropy(dna_pool),
-            entropy_fitness_scores=entropy(scores),
-            bases_not_in_genes=sum([len(dna.code) % Gene.length() for dna in dna_all]),
-            genes_total=sum([len(dna.genes) for dna in dna_all]),
-            genes_max=max([len(dna.genes) for dna in dna_all]),
-            genes_min=min([len(dna.genes) for dna in dna_all]),
-            genes_expressed=sum(1 for cb in control_bases if cb >= hyperparams.expression_threshold),
-            genes_supressed=sum(1 for cb in control_bases if cb < hyperparams.expression_threshold),
-            creatures_survived=len([r for r in records if not r.died_during_motion]),
-            creatures_dead=len([r for r in records if r.died_during_motion]))
+            entropy_dna_pool=float(entropy(dna_bases)),
+            entropy_fitness_scores=float(entropy(scores)),
+            bases_not_in_genes=int((lengths % Gene.length()).sum()),
+            genes_total=int(gene_counts.sum()),
+            genes_max=int(gene_counts.max()),
+            genes_min=int(gene_counts.min()),
+            genes_expressed=genes_expressed,
+            genes_supressed=len(control_bases) - genes_expressed,
+            creatures_survived=int(np.count_nonzero(~lethal)),
+            creatures_dead=int(np.count_nonzero(lethal)))
 
 
 @dataclass(eq=True, frozen=True, order=True)
@@ -174,6 +322,9 @@ class EvolutionRecord:
     is_elite_from_previous: bool = False
     died_during_motion: bool = False
 
+    # the last position of creatures that were never tracked
+    UNTRACKED_POSITION = '0 0 0'
+
     @staticmethod
     def from_creature(creature: Creature, is_previous_fittest: bool) -> "EvolutionRecord":
         return EvolutionRecord(
@@ -182,7 +333,7 @@ class EvolutionRecord:
             is_elite_from_previous=is_previous_fittest,
             died_during_motion=creature.movement.lethal_move,
             first_position=' '.join(str(x) for x in list(creature.movement.initial)),
-            last_position=' '.join(str(x) for x in list(creature.movement.last)) if creature.movement.last else '0 0 0',
+            last_position=' '.join(str(x) for x in list(creature.movement.last)) if creature.movement.last else EvolutionRecord.UNTRACKED_POSITION,
             fitness_score=creature.movement.distance)
 
     def extract_last_position_as_tuple(self) -> Tuple[float, float, float]:
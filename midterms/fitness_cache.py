@@ -0,0 +1,134 @@
+from dataclasses import fields
+from typing import Optional, Tuple
+
+import dbm
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from hyperparams import Hyperparams
+from creature import Creature, CreatureMovement
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+
+class FitnessCache:
+    """
+    Content-addressed cache of simulated movements, keyed by a hash of the DNA code
+    and of the hyperparams that affect the simulation. Recent entries are kept in memory
+    (LRU), and all of them on disk under the evolution folder, if one is given.
+    """
+    hyperparams: Hyperparams
+    capacity: int
+    hits: int
+    misses: int
+
+    def __init__(self, hyperparams: Hyperparams, folder: Optional[Path] = None, capacity: int = 10_000):
+        self.hyperparams = hyperparams
+        self.capacity = capacity
+        self.fingerprint = FitnessCache._fingerprint(hyperparams)
+        self.memory: "OrderedDict[str, CreatureMovement]" = OrderedDict()
+        self.disk = dbm.open(str(folder / "fitness.cache"), "c") if folder else None
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+        LOGGER.debug(f"Fitness Cache, {self.hits} hits, {self.misses} misses")
+
+    @property
+    def is_enabled(self) -> bool:
+        # when creatures are stopped for being hopeless, their movement depends
+        # on the elite at the time, not only on their DNA, so it cannot be cached.
+        return not self.hyperparams.simulation_stop_hopeless
+
+    @property
+    def is_restoring(self) -> bool:
+        # telemetry is only recorded while simulating, so creatures (including the
+        # elites carried over) are simulated again rather than restored while it is on.
+        return self.is_enabled and not self.hyperparams.simulation_telemetry_interval
+
+    def key(self, dna_code: np.ndarray) -> str:
+        code = np.asarray(dna_code, dtype=np.float64).tobytes()
+        return hashlib.blake2b(code + self.fingerprint, digest_size=16).hexdigest()
+
+    def restore(self, creature: Creature) -> bool:
+        """
+        Restores the movement of the creature if its DNA has already been simulated.
+        """
+        if not self.is_restoring:
+            return False
+        key = self.key(creature.dna.code)
+        movement = self._get(key)
+        if movement is None:
+            self.misses += 1
+            return False
+        self.hits += 1
+        creature.movement.restore(movement)
+        return True
+
+    def store(self, creature: Creature):
+        if self.is_enabled:
+            key = self.key(creature.dna.code)
+            self._put_in_memory(key, creature.movement)
+            if self.disk is not None:
+                self.disk[key] = FitnessCache._encode(creature.movement)
+
+    def _get(self, key: str) -> Optional[CreatureMovement]:
+        movement = self.memory.get(key)
+        if movement is not None:
+            self.memory.move_to_end(key)
+            return movement
+        if self.disk is not None and key in self.disk:
+            movement = FitnessCache._decode(self.disk[key])
+            self._put_in_memory(key, movement)
+            return movement
+        return None
+
+    def _put_in_memory(self, key: str, movement: CreatureMovement):
+        copy = CreatureMovement()
+        copy.restore(movement)
+        self.memory[key] = copy
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    @staticmethod
+    def _fingerprint(hyperparams: Hyperparams) -> bytes:
+        relevant = [
+            (field.name, hyperparams.__dict__[field.name])
+            for field in fields(hyperparams)
+            if field.name == "expression_threshold"
+            or (field.name.startswith("simulation_") and not field.name.startswith("simulation_telemetry_"))]
+        return repr(relevant).encode("utf-8")
+
+    @staticmethod
+    def _encode(movement: CreatureMovement) -> str:
+        initial = ' '.join(str(x) for x in movement.initial)
+        last = ' '.join(str(x) for x in movement.last) if movement.last else ''
+        return f"{initial}|{last}|{int(movement.lethal_move)}"
+
+    @staticmethod
+    def _decode(data: bytes) -> CreatureMovement:
+        initial, last, lethal = data.decode("utf-8").split('|')
+        movement = CreatureMovement()
+        movement.initial = FitnessCache._decode_position(initial)
+        movement.last = FitnessCache._decode_position(last) if last else None
+        movement.lethal_move = lethal == "1"
+        return movement
+
+    @staticmethod
+    def _decode_position(data: str) -> Tuple[float, float, float]:
+        x, y, z = [float(d) for d in data.split(' ')]
+        return (x, y, z)
@@ -0,0 +1,46 @@
+"""
+Small creatures and hyperparams shared by the tests, so they do not depend on each other.
+"""
+from typing import Any, Dict
+
+import random
+
+from creature import Creature
+from dna import Dna
+from gene import Gene
+from hyperparams import Hyperparams
+
+
+def create_creature() -> Creature:
+    """
+    A creature of 4 random genes, the last of which is always expressed.
+    """
+    dna_code = [random.random() for _ in range(Gene.length() * 3)] + [1.] * Gene.length()
+    creature = Creature.develop_from(dna=Dna.parse_dna(dna_code), threshold_for_expression=0.5)
+    assert creature
+    return creature
+
+
+def create_hyperparams(**kwargs) -> Hyperparams:
+    """
+    Hyperparams for a short simulation of a small population, overridden by `kwargs`.
+    """
+    params: Dict[str, Any] = dict(
+        crossover_min_len=0.25,
+        crossover_max_len=0.75,
+        point_mutation_enabled=True,
+        point_mutation_rate=0.1,
+        point_mutation_amount=0.1,
+        shrink_mutation_enabled=True,
+        shrink_mutation_rate=0.1,
+        grow_mutation_enabled=True,
+        grow_mutation_rate=0.1,
+        reproduction_max_attempts=100,
+        elitist_behaviour=True,
+        expression_threshold=0.5,
+        population_size=10,
+        simulation_steps=10,
+        gene_count_genesis=3,
+        gene_count_max=18)
+    params.update(kwargs)
+    return Hyperparams(**params)
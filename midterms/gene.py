@@ -1,15 +1,46 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Union
 
+import numpy as np
 
-@dataclass(eq=True, frozen=True, order=True)
+
+@dataclass(eq=False, frozen=True)
 class Gene:
-    code: List[float]
+    """
+    A view over the 18 bases of a gene, within the code of its DNA.
+    The `Gene.*` column constants index the same bases in `Dna.matrix`.
+    """
+    code: np.ndarray
+
+    LINK_SHAPE = 0
+    LINK_LENGTH = 1
+    LINK_RADIUS = 2
+    LINK_RECURRENCE = 3
+    LINK_MASS = 4
+    JOINT_PARENT = 5
+    JOINT_TYPE = 6
+    JOINT_AXIS_XYZ = 7
+    JOINT_ORIGIN_RPY_R = 8
+    JOINT_ORIGIN_RPY_P = 9
+    JOINT_ORIGIN_RPY_Y = 10
+    JOINT_ORIGIN_XYZ_X = 11
+    JOINT_ORIGIN_XYZ_Y = 12
+    JOINT_ORIGIN_XYZ_Z = 13
+    CONTROL_WAVEFORM = 14
+    CONTROL_AMP = 15
+    CONTROL_FREQ = 16
+    CONTROL_EXPRESSION = 17
 
     @staticmethod
-    def create_from(code: List[float]) -> "Gene":
+    def create_from(code: Union[np.ndarray, List[float]]) -> "Gene":
         assert len(code) == Gene.length()
-        return Gene(code)
+        return Gene(np.asarray(code, dtype=np.float64))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Gene) and np.array_equal(self.code, other.code)
+
+    def __hash__(self) -> int:
+        return hash(self.code.tobytes())
 
     @staticmethod
     def length() -> int:
@@ -20,72 +51,72 @@ class Gene:
 
     @property
     def link_shape(self) -> float:
-        return self.code[0]
+        return self.code[Gene.LINK_SHAPE]
 
     @property
     def link_length(self) -> float:
-        return self.code[1]
+        return self.code[Gene.LINK_LENGTH]
 
     @property
     def link_radius(self) -> float:
-        return self.code[2]
+        return self.code[Gene.LINK_RADIUS]
 
     @property
     def link_recurrence(self) -> float:
-        return self.code[3]
+        return self.code[Gene.LINK_RECURRENCE]
 
     @property
     def link_mass(self) -> float:
-        return self.code[4]
+        return self.code[Gene.LINK_MASS]
 
     @property
     def joint_parent(self) -> float:
-        return self.code[5]
+        return self.code[Gene.JOINT_PARENT]
 
     @property
     def joint_type(self) -> float:
-        return self.code[6]
+        return self.code[Gene.JOINT_TYPE]
 
     @property
     def joint_axis_xyz(self) -> float:
-        return self.code[7]
+        return self.code[Gene.JOINT_AXIS_XYZ]
 
     @property
     def joint_origin_rpy_r(self) -> float:
-        return self.code[8]
+        return self.code[Gene.JOINT_ORIGIN_RPY_R]
 
     @property
     def joint_origin_rpy_p(self) -> float:
-        return self.code[9]
+        return self.code[Gene.JOINT_ORIGIN_RPY_P]
 
     @property
     def joint_origin_rpy_y(self) -> float:
-        return self.code[10]
+        return self.code[Gene.JOINT_ORIGIN_RPY_Y]
 
     @property
     def joint_origin_xyz_x(self) -> float:
-        return self.code[11]
+        return self.code[Gene.JOINT_ORIGIN_XYZ_X]
 
     @property
     def joint_origin_xyz_y(self) -> float:
-        return self.code[12]
+        return self.code[Gene.JOINT_ORIGIN_XYZ_Y]
 
     @property
     def joint_origin_xyz_z(self) -> float:
-        return self.code[13]
+        return self.code[Gene.JOINT_ORIGIN_XYZ_Z]
 
     @property
     def control_waveform(self) -> float:
-        return self.code[14]
+        return self.code[Gene.CONTROL_WAVEFORM]
 
     @property
     def control_amp(self) -> float:
-        return self.code[15]
+        return self.code[Gene.CONTROL_AMP]
 
     @property
     def control_freq(self) -> float:
-        return self.code[16]
+        return self.code[Gene.CONTROL_FREQ]
 
     @property
     def control_expression(self) -> float:
-        return self.code[17]
+        return self.code[Gene.CONTROL_EXPRESSION]
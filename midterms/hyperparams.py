@@ -1,6 +1,6 @@
 from argparse import Namespace
 from dataclasses import dataclass, fields
-from typing import Optional
+from typing import ClassVar, Dict, Optional
 
 
 @dataclass(eq=True, frozen=True, order=True)
@@ -21,6 +21,40 @@ class Hyperparams:
     simulation_steps: int
     gene_count_genesis: int
     gene_count_max: int
+    simulation_timestep: float = 1. / 240
+    simulation_substeps: int = 1
+    simulation_motor_interval: int = 1
+    simulation_tracking_interval: int = 1
+    simulation_stop_on_lethal: bool = True
+    simulation_stall_steps: int = 0
+    simulation_stall_epsilon: float = 0.001
+    simulation_stop_hopeless: bool = False
+    simulation_batch_size: int = 1
+    simulation_restore_state: bool = True
+    simulation_telemetry_interval: int = 0
+    simulation_telemetry_samples: int = 1000
+    seed: Optional[int] = None
+    selection_strategy: str = "roulette"
+    selection_tournament_size: int = 3
+    selection_truncation_ratio: float = 0.5
+
+    # the lowest value accepted for the hyperparams that count steps or samples
+    MINIMUMS: ClassVar[Dict[str, int]] = {
+        "simulation_substeps": 1,
+        "simulation_motor_interval": 1,
+        "simulation_tracking_interval": 1,
+        "simulation_stall_steps": 0,
+        "simulation_batch_size": 1,
+        "simulation_telemetry_interval": 0,
+        "simulation_telemetry_samples": 1,
+        "selection_tournament_size": 1,
+    }
+
+    def __post_init__(self):
+        for name, minimum in Hyperparams.MINIMUMS.items():
+            value = getattr(self, name)
+            if value < minimum:
+                raise ValueError(f"{name} must be at least {minimum}, got {value}")
 
     @staticmethod
     def from_args(args: Namespace, gene_count_genesis: Optional[int] = None) -> "Hyperparams":
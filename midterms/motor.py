@@ -15,6 +15,7 @@ class Motor(Iterator):
         self.waveform = waveform
         self.amp = amp
         self.freq = freq
+        self.phase = 0.
 
     @staticmethod
     def generate_from(phenotype: Phenotype) -> "Motor":
@@ -1,14 +1,22 @@
 from dataclasses import dataclass, is_dataclass, asdict, fields
-from typing import List, Dict, Any, Union, Optional
+from typing import List, Dict, Any, Iterator, Set, Union, Optional, Tuple
 from abc import ABC
 
+import hashlib
+import itertools
 import json
 import os
+import queue
+import tempfile
+import threading
+import time
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from dna import Dna
+from population import Population
 from evolution import EvolutionGeneration, EvolutionMetrics, EvolutionRecord
 from hyperparams import Hyperparams
 
@@ -19,6 +27,11 @@ LOGGER = logging.getLogger(__name__)
 @dataclass(eq=True, frozen=True, order=True)
 class PersistenceSettings:
     folder: Path
+    storage_format: str = "json"
+
+    @staticmethod
+    def storage_formats() -> List[str]:
+        return ["json", "npz"]
 
 
 class BaseRepository(ABC):
@@ -36,63 +49,200 @@ class BaseRepository(ABC):
 
 class DnaRepository(BaseRepository):
 
+    _hashes: Dict[str, Set[bytes]]
+
     def __init__(self, settings: PersistenceSettings):
         super(DnaRepository, self).__init__(settings)
+        self._hashes = dict()
 
     def filepath(self, species: str) -> Path:
         return self.settings.folder / f"{species}.dna"
 
+    def filepath_index(self, species: str) -> Path:
+        return self.settings.folder / f"{species}.dna.idx"
+
     """
     Reads and Writes DNA into files, with options to append/override
     as well as reading specific individuals from the store.
+    Next to each species file, a `.dna.idx` sidecar keeps the byte offset
+    at which each individual starts (`uint64`), ending with the size of the file,
+    so that any individual is read without scanning the ones before it.
     """
 
+    INDEX_DTYPE = np.dtype('<u8')
+
     def read(self, species: str, individual: Optional[int] = None) -> Optional[Dna]:
         """
-        Read a particular individual or the top one of a species DNA file.
+        Read a particular individual or the last one of a species DNA file.
         """
         filepath = self.filepath(species)
         self.ensure_file_dir(filepath)
+        if not os.path.isfile(filepath):
+            return None
+        count = self.count(species)
         if individual is None:
-            count = 0
-            with open(filepath, 'r+', encoding='utf-8') as fh:
-                for i, line in enumerate(fh):
-                    if line:
-                        count = i
-            individual = count
-        if os.path.isfile(filepath):
-            with open(filepath, 'r+', encoding='utf-8') as fh:
-                for i, line in enumerate(fh):
-                    if i == individual:
-                        LOGGER.debug(f"DNA, {species}.dna, reading line {individual}: {line}")
-                        return Dna.parse_dna(line)
-        return None
+            individual = count - 1
+        if not 0 <= individual < count:
+            return None
+        with open(self.filepath_index(species), 'rb') as fh:
+            fh.seek(individual * DnaRepository.INDEX_DTYPE.itemsize)
+            start, end = np.frombuffer(fh.read(2 * DnaRepository.INDEX_DTYPE.itemsize), dtype=DnaRepository.INDEX_DTYPE).tolist()
+        with open(filepath, 'rb') as fh:
+            fh.seek(start)
+            line = fh.read(end - start).decode('utf-8')
+        LOGGER.debug(f"DNA, {species}.dna, reading line {individual}: {line}")
+        return Dna.parse_dna(line)
+
+    def read_all(self, species: str, batch_size: int = 1024) -> Iterator[Dna]:
+        """
+        Streams every individual of a species DNA file, parsing `batch_size` of them at a time.
+        """
+        filepath = self.filepath(species)
+        if not os.path.isfile(filepath):
+            return
+        with open(filepath, 'r', encoding='utf-8') as fh:
+            while True:
+                lines = [line for line in itertools.islice(fh, batch_size) if line.strip()]
+                if not lines:
+                    break
+                yield from Dna.parse_many(lines)
+
+    def count(self, species: str) -> int:
+        """
+        How many individuals there are in a species DNA file, from its index.
+        """
+        filepath = self.filepath(species)
+        if not os.path.isfile(filepath):
+            return 0
+        return self._ensure_index(species, os.path.getsize(filepath)) - 1
 
-    def write(self, species: str, dna_code: Union[List[float], str], override: bool = False):
+    def write(self, species: str, dna_code: Union[List[float], str], override: bool = False, unique: bool = False):
         """
         Overrides or appends to a species DNA file.
         """
+        self.write_many(species, [dna_code], override=override, unique=unique)
+
+    def write_many(self, species: str, dna_codes: List[Union[List[float], str]], override: bool = False, unique: bool = False):
+        """
+        Overrides or appends many DNA to a species DNA file, opening it only once,
+        and appends their offsets to the index.
+        If `unique`, DNA already in the file (or earlier in `dna_codes`) is skipped,
+        so the file never needs to be deduplicated.
+        """
         filepath = self.filepath(species)
-        with open(filepath, 'w+' if override else 'a+', encoding='utf-8') as fh:
-            line = dna_code if isinstance(dna_code, str) else ",".join([str(base) for base in dna_code])
-            fh.write(f"{line}\n")
-            LOGGER.debug(f"DNA, {species}.dna, {'overriden' if override else 'appended'}: {line}")
+        self.ensure_file_dir(filepath)
+        lines = [(dna_code if isinstance(dna_code, str) else Dna.format_code(dna_code)).strip() for dna_code in dna_codes]
+        if override:
+            # the file is about to be truncated, so its DNA must not count as already written
+            self._hashes.pop(species, None)
+            if unique:
+                self._hashes[species] = set()
+        if unique:
+            hashes = self._hashes_of(species)
+            kept = []
+            for line in lines:
+                key = DnaRepository._hash_of(line.encode('utf-8'))
+                if key not in hashes:
+                    hashes.add(key)
+                    kept.append(line)
+            lines = kept
+        elif species in self._hashes:
+            self._hashes[species].update(DnaRepository._hash_of(line.encode('utf-8')) for line in lines)
+        data = [f"{line}\n".encode('utf-8') for line in lines]
+        size = 0 if override or not os.path.isfile(filepath) else os.path.getsize(filepath)
+        if override and os.path.isfile(self.filepath_index(species)):
+            os.remove(self.filepath_index(species))
+        if size:
+            self._ensure_index(species, size)
+        with open(filepath, 'wb' if override else 'ab') as fh:
+            fh.writelines(data)
+        with open(self.filepath_index(species), 'ab') as fh:
+            offsets = np.cumsum([len(d) for d in data], dtype=np.int64) + size
+            if not size:
+                offsets = np.concatenate([[0], offsets])
+            fh.write(offsets.astype(DnaRepository.INDEX_DTYPE).tobytes())
+        LOGGER.debug(f"DNA, {species}.dna, {'overriden' if override else 'appended'}: {len(lines)} lines")
+
+    def _ensure_index(self, species: str, size: int) -> int:
+        """
+        Rebuilds the index if it does not end at `size`, which is the case for files
+        written before the index existed or changed by something else,
+        returning how many offsets it has.
+        """
+        filepath_index = self.filepath_index(species)
+        if os.path.isfile(filepath_index):
+            count = os.path.getsize(filepath_index) // DnaRepository.INDEX_DTYPE.itemsize
+            if count:
+                with open(filepath_index, 'rb') as fh:
+                    fh.seek((count - 1) * DnaRepository.INDEX_DTYPE.itemsize)
+                    if np.frombuffer(fh.read(), dtype=DnaRepository.INDEX_DTYPE)[0] == size:
+                        return count
+        LOGGER.info(f"DNA, {species}.dna, rebuilding index")
+        offsets = [0]
+        with open(self.filepath(species), 'rb') as fh:
+            for line in fh:
+                if line.strip():
+                    offsets.append(offsets[-1] + len(line))
+                else:
+                    offsets[-1] += len(line)
+        with open(filepath_index, 'wb') as fh:
+            fh.write(np.array(offsets, dtype=DnaRepository.INDEX_DTYPE).tobytes())
+        return len(offsets)
 
     def dedup(self, species: str):
         """
-        Removes duplicated DNA from the file
+        Removes duplicated DNA from the file, keeping the first of each, streaming it
+        (and its index) into temporary files that atomically replace them.
+        Lines are compared by a fixed-size hash, so memory only grows by 16 bytes per unique line.
         """
         filepath = self.filepath(species)
-        dna_all = []
-        dna_used = set()
-        with open(filepath, 'r+', encoding='utf-8') as fh:
-            for line in fh:
-                dna_all.append(line.strip())
-        with open(filepath, 'w+', encoding='utf-8') as fh:
-            for dna_code in dna_all:
-                if dna_code not in dna_used:
-                    dna_used.add(dna_code)
-                    fh.write(f"{dna_code}\n")
+        if not os.path.isfile(filepath):
+            return
+        seen = set()
+        folder = filepath.parent
+        fh_out = tempfile.NamedTemporaryFile('wb', dir=folder, suffix=".dna.tmp", delete=False)
+        fh_idx = tempfile.NamedTemporaryFile('wb', dir=folder, suffix=".idx.tmp", delete=False)
+        try:
+            with open(filepath, 'rb') as fh_in, fh_out, fh_idx:
+                offset = 0
+                fh_idx.write(np.array([offset], dtype=DnaRepository.INDEX_DTYPE).tobytes())
+                for line in fh_in:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    key = DnaRepository._hash_of(line)
+                    if key not in seen:
+                        seen.add(key)
+                        fh_out.write(line + b"\n")
+                        offset += len(line) + 1
+                        fh_idx.write(np.array([offset], dtype=DnaRepository.INDEX_DTYPE).tobytes())
+            os.replace(fh_out.name, filepath)
+            os.replace(fh_idx.name, self.filepath_index(species))
+        finally:
+            for name in [fh_out.name, fh_idx.name]:
+                if os.path.isfile(name):
+                    os.remove(name)
+        self._hashes[species] = seen
+        LOGGER.debug(f"DNA, {species}.dna, deduplicated: {len(seen)} lines")
+
+    def _hashes_of(self, species: str) -> Set[bytes]:
+        """
+        The hashes of the DNA in a species file, read once and kept up to date on append.
+        """
+        if species not in self._hashes:
+            hashes = set()
+            filepath = self.filepath(species)
+            if os.path.isfile(filepath):
+                with open(filepath, 'rb') as fh:
+                    for line in fh:
+                        if line.strip():
+                            hashes.add(DnaRepository._hash_of(line.strip()))
+            self._hashes[species] = hashes
+        return self._hashes[species]
+
+    @staticmethod
+    def _hash_of(line: bytes) -> bytes:
+        return hashlib.blake2b(line, digest_size=16).digest()
 
 
 class EvolutionRepository(BaseRepository):
@@ -126,11 +276,22 @@ class EvolutionRepository(BaseRepository):
     def filepath_generation(self, generation_id) -> Path:
         return self.settings.folder / f"generation-{str(generation_id).rjust(4, '0')}.gen"
 
+    def filepath_generation_columns(self, generation_id) -> Path:
+        return self.settings.folder / f"generation-{str(generation_id).rjust(4, '0')}.npz"
+
     def filepath_summary(self) -> Path:
         return self.settings.folder / f'summary.evo'
 
     def read(self, generation_id: int) -> Optional[EvolutionGeneration]:
+        """
+        Reads the generation from whichever format it was last stored in.
+        """
         if generation_id is not None:
+            if self.stored_format(generation_id) == "npz":
+                columns = self.read_columns(generation_id)
+                assert columns is not None
+                with columns:
+                    return columns.to_generation()
             filepath = self.filepath_generation(generation_id)
             self.ensure_file_dir(filepath)
             if os.path.isfile(filepath):
@@ -139,23 +300,370 @@ class EvolutionRepository(BaseRepository):
                     return generation
         return None
 
+    def read_genesis(self, generation_id: int) -> Tuple[Optional[Hyperparams], Optional[Population]]:
+        """
+        Reads the hyperparams and the population of a generation, to evolve from it.
+        Stored as columns, creatures develop straight from the DNA bases, skipping the text.
+        """
+        if self.stored_format(generation_id) == "npz":
+            columns = self.read_columns(generation_id)
+            assert columns is not None
+            with columns:
+                hyperparams = Hyperparams(**columns.meta['hyperparams'])
+                return hyperparams, EvolutionGeneration.develop_population(
+                    Dna.split_many(columns.dna_bases, columns.dna_offsets),
+                    last_positions=[(x, y, z) for x, y, z in columns.column("last_position").tolist()],
+                    died_during_motion=columns.died_during_motion.tolist(),
+                    threshold_for_expression=hyperparams.expression_threshold)
+        generation = self.read(generation_id)
+        if generation:
+            return generation.hyperparams, generation.to_population()
+        return None, None
+
+    def stored_format(self, generation_id: int) -> Optional[str]:
+        """
+        The format the generation was stored in, which is the configured `storage_format`
+        whenever it was stored in it, falling back to the other one otherwise.
+        """
+        filepaths = {"json": self.filepath_generation(generation_id), "npz": self.filepath_generation_columns(generation_id)}
+        storage_formats = [self.settings.storage_format] + [f for f in PersistenceSettings.storage_formats() if f != self.settings.storage_format]
+        for storage_format in storage_formats:
+            if os.path.isfile(filepaths[storage_format]):
+                return storage_format
+        return None
+
+    def read_columns(self, generation_id: int) -> Optional["GenerationColumns"]:
+        """
+        Opens a generation stored as columns, without loading any of them yet.
+        """
+        filepath = self.filepath_generation_columns(generation_id)
+        if os.path.isfile(filepath):
+            return GenerationColumns(np.load(filepath, allow_pickle=False))
+        return None
+
     def write(self, generation: EvolutionGeneration):
+        if self.settings.storage_format == "npz":
+            self._write_columns(generation)
+        else:
+            self._write_json(generation)
+
+    def _write_json(self, generation: EvolutionGeneration):
         filepath = self.filepath_generation(generation.generation_id)
         self.ensure_file_dir(filepath)
         with open(filepath, 'w+', encoding='utf-8') as fh:
             json.dump(generation, fh, indent=4, cls=EvolutionRepository.EvolutionEncoder)
 
+    def _write_columns(self, generation: EvolutionGeneration):
+        filepath = self.filepath_generation_columns(generation.generation_id)
+        self.ensure_file_dir(filepath)
+        with open(filepath, 'wb') as fh:
+            columns: Dict[str, Any] = GenerationColumns.from_generation(generation)
+            np.savez(fh, **columns)
+
     def summarise(self, generations: List[EvolutionGeneration]):
         filepath = self.filepath_summary()
         self.ensure_file_dir(filepath)
-        table: List[Dict[str, Any]] = []
-        for generation in generations:
-            metrics = {
-                'generation_id': generation.generation_id,
-                'elite_score_previous': generation.elite_previous.fitness_score if generation.elite_previous else None,
-                'elite_score_offspring': generation.elite_offspring.fitness_score if generation.elite_offspring else None}
-            for field in fields(generation.metrics):
-                metrics[field.name] = generation.metrics.__dict__[field.name]
-            table.append(metrics)
+        table: List[Dict[str, Any]] = [EvolutionRepository._summary_row(generation) for generation in generations]
         df = pd.DataFrame(table)
         df.to_csv(self.filepath_summary(), sep='\t', index=False)
+
+    def append_summary(self, generation: EvolutionGeneration) -> bool:
+        """
+        Appends the generation to the summary as one more row (with the header, if the file is new),
+        in the order of the columns of its header. Generations up to the last one already
+        summarised are skipped, so a resumed run carries on from where it stopped.
+        """
+        filepath = self.filepath_summary()
+        self.ensure_file_dir(filepath)
+        row = EvolutionRepository._summary_row(generation)
+        header = self.read_summary_header()
+        if header is None:
+            header = list(row.keys())
+            with open(filepath, 'w', encoding='utf-8') as fh:
+                fh.write('\t'.join(header) + '\n')
+        else:
+            last = self.read_summary_tail()
+            if last and last.get('generation_id') and int(last['generation_id']) >= generation.generation_id:
+                LOGGER.debug(f"Summary, generation {generation.generation_id} already summarised")
+                return False
+        with open(filepath, 'a', encoding='utf-8') as fh:
+            fh.write('\t'.join(EvolutionRepository._summary_value(row.get(column)) for column in header) + '\n')
+        return True
+
+    def read_summary_header(self) -> Optional[List[str]]:
+        filepath = self.filepath_summary()
+        if not os.path.isfile(filepath) or not os.path.getsize(filepath):
+            return None
+        with open(filepath, 'r', encoding='utf-8') as fh:
+            return fh.readline().rstrip('\n').split('\t')
+
+    def read_summary_tail(self) -> Optional[Dict[str, str]]:
+        """
+        Reads the last row of the summary, seeking from the end of the file instead of reading all of it.
+        """
+        header = self.read_summary_header()
+        if header is None:
+            return None
+        with open(self.filepath_summary(), 'rb') as fh:
+            end = fh.seek(0, os.SEEK_END)
+            block = b''
+            position = end
+            while position > 0 and block.rstrip(b'\n').count(b'\n') < 1:
+                position = max(0, position - 4096)
+                fh.seek(position)
+                block = fh.read(end - position)
+        line = block.rstrip(b'\n').rsplit(b'\n', 1)[-1].decode('utf-8')
+        values = line.split('\t')
+        if values == header:
+            return None
+        return dict(zip(header, values))
+
+    @staticmethod
+    def _summary_row(generation: EvolutionGeneration) -> Dict[str, Any]:
+        metrics = {
+            'generation_id': generation.generation_id,
+            'elite_score_previous': generation.elite_previous.fitness_score if generation.elite_previous else None,
+            'elite_score_offspring': generation.elite_offspring.fitness_score if generation.elite_offspring else None}
+        for field in fields(generation.metrics):
+            metrics[field.name] = generation.metrics.__dict__[field.name]
+        return metrics
+
+    @staticmethod
+    def _summary_value(value: Any) -> str:
+        """
+        Same as written by pandas: empty for missing values and the shortest repr of floats.
+        """
+        if value is None:
+            return ''
+        if isinstance(value, float):
+            return repr(value)
+        return str(value)
+
+
+@dataclass
+class PersistenceWriterStats:
+    """
+    How much the producer had to wait for the disk (back-pressure),
+    and how the writes were batched.
+    """
+    submitted: int = 0
+    written: int = 0
+    batches: int = 0
+    blocked: int = 0
+    blocked_seconds: float = 0.
+    queue_depth_max: int = 0
+
+
+class PersistenceWriter:
+    """
+    Writes generations and DNA behind the evolution, in a background thread,
+    so that evolving the next generation does not wait for the disk.
+    The queue is bounded: when it is full, submitting blocks (and is counted
+    in the `stats`) until the writer catches up. Everything submitted is
+    written before `close` returns, in the order it was submitted.
+    """
+    evolution_repository: EvolutionRepository
+    dna_repository: DnaRepository
+    stats: PersistenceWriterStats
+
+    _STOP = object()
+
+    def __init__(self, evolution_repository: EvolutionRepository, dna_repository: DnaRepository, queue_size: int = 8):
+        self.evolution_repository = evolution_repository
+        self.dna_repository = dna_repository
+        self.stats = PersistenceWriterStats()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def write_generation(self, generation: EvolutionGeneration):
+        self._submit(("generation", generation))
+
+    def write_summary(self, generation: EvolutionGeneration):
+        self._submit(("summary", generation))
+
+    def write_dna(self, species: str, dna_code: Union[List[float], str], unique: bool = False):
+        self._submit(("dna", (species, dna_code, unique)))
+
+    def close(self):
+        """
+        Flushes everything pending, stops the writer and raises what it failed on, if anything.
+        """
+        if self._thread.is_alive():
+            self._queue.put(PersistenceWriter._STOP)
+            self._thread.join()
+            LOGGER.info(f"Persistence, {self.stats}")
+        if self._error:
+            error, self._error = self._error, None
+            raise error
+
+    def _submit(self, item: Tuple[str, Any]):
+        if self._error:
+            self.close()
+        if not self._thread.is_alive():
+            raise RuntimeError("The persistence writer is closed")
+        self.stats.submitted += 1
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            started = time.perf_counter()
+            self._queue.put(item)
+            self.stats.blocked += 1
+            self.stats.blocked_seconds += time.perf_counter() - started
+        self.stats.queue_depth_max = max(self.stats.queue_depth_max, self._queue.qsize())
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is PersistenceWriter._STOP:
+                batch.pop()
+                stopping = True
+            if batch and not self._error:
+                try:
+                    self._write_batch(batch)
+                except BaseException as e:
+                    LOGGER.exception("Persistence, failed writing behind")
+                    self._error = e
+
+    def _write_batch(self, batch: List[Tuple[str, Any]]):
+        """
+        Writes the generations, and appends the DNA of consecutive items
+        of the same species at once.
+        """
+        self.stats.batches += 1
+        for kind, group in itertools.groupby(batch, key=lambda item: (item[0],) + (item[1][0::2] if item[0] == "dna" else (id(item),))):
+            items = [payload for _, payload in group]
+            if kind[0] == "generation":
+                for generation in items:
+                    self.evolution_repository.write(generation)
+            elif kind[0] == "summary":
+                for generation in items:
+                    self.evolution_repository.append_summary(generation)
+            else:
+                self.dna_repository.write_many(kind[1], [dna_code for _, dna_code, _ in items], unique=kind[2])
+            self.stats.written += len(items)
+
+
+class GenerationColumns:
+    """
+    A generation stored as `.npz` columns: the DNA of every offspring as a flat array
+    of bases split by offsets, next to their fitness, positions and flags.
+    Everything else (hyperparams, metrics and elites) is kept as JSON in `meta`.
+    Each column is only read from disk when first accessed.
+    """
+
+    def __init__(self, npz) -> None:
+        self.npz = npz
+        self.loaded: Dict[str, np.ndarray] = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        self.npz.close()
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self.loaded:
+            self.loaded[name] = self.npz[name]
+        return self.loaded[name]
+
+    def __len__(self) -> int:
+        return len(self.column("fitness_score"))
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return json.loads(self.column("meta").item().decode('utf-8'))
+
+    @property
+    def fitness_score(self) -> np.ndarray:
+        return self.column("fitness_score")
+
+    @property
+    def died_during_motion(self) -> np.ndarray:
+        return self.column("died_during_motion")
+
+    @property
+    def dna_bases(self) -> np.ndarray:
+        return self.column("dna_bases")
+
+    @property
+    def dna_offsets(self) -> np.ndarray:
+        return self.column("dna_offsets")
+
+    def dna_code_of(self, index: int) -> np.ndarray:
+        return self.dna_bases[self.dna_offsets[index]:self.dna_offsets[index + 1]]
+
+    @staticmethod
+    def from_generation(generation: EvolutionGeneration) -> Dict[str, np.ndarray]:
+        records = generation.offspring_fitness or []
+        dna_codes = Dna.parse_many([r.dna_code for r in records])
+        meta = {
+            'generation_id': generation.generation_id,
+            'hyperparams': generation.hyperparams,
+            'metrics': generation.metrics,
+            'elite_previous': generation.elite_previous,
+            'elite_offspring': generation.elite_offspring}
+        return dict(
+            meta=np.array(json.dumps(meta, cls=EvolutionRepository.EvolutionEncoder).encode('utf-8')),
+            dna_bases=np.concatenate([dna.code for dna in dna_codes]) if dna_codes else np.empty(0, dtype=np.float64),
+            dna_offsets=np.concatenate([[0], np.cumsum([len(dna.code) for dna in dna_codes], dtype=np.int64)]),
+            phenotype_count=np.array([r.phenotype_count for r in records], dtype=np.int64),
+            first_position=GenerationColumns._positions([r.first_position for r in records]),
+            last_position=GenerationColumns._positions([r.last_position for r in records]),
+            last_position_tracked=np.array([r.last_position != EvolutionRecord.UNTRACKED_POSITION for r in records], dtype=bool),
+            fitness_score=np.array([r.fitness_score for r in records], dtype=np.float64),
+            is_elite_from_previous=np.array([r.is_elite_from_previous for r in records], dtype=bool),
+            died_during_motion=np.array([r.died_during_motion for r in records], dtype=bool))
+
+    def to_generation(self) -> EvolutionGeneration:
+        meta = self.meta
+        return EvolutionGeneration(
+            generation_id=meta['generation_id'],
+            hyperparams=Hyperparams(**meta['hyperparams']),
+            metrics=EvolutionMetrics(**meta['metrics']),
+            elite_previous=EvolutionRecord(**meta['elite_previous']) if meta['elite_previous'] else None,
+            elite_offspring=EvolutionRecord(**meta['elite_offspring']) if meta['elite_offspring'] else None,
+            offspring_fitness=self.to_records())
+
+    def to_records(self) -> List[EvolutionRecord]:
+        # stored before untracked positions were told apart
+        last_position_tracked = self.column("last_position_tracked") if "last_position_tracked" in self.npz.files else np.ones(len(self), dtype=bool)
+        columns = zip(
+            self.column("phenotype_count").tolist(),
+            self.column("first_position").tolist(),
+            self.column("last_position").tolist(),
+            last_position_tracked.tolist(),
+            self.fitness_score.tolist(),
+            self.column("is_elite_from_previous").tolist(),
+            self.died_during_motion.tolist())
+        return [
+            EvolutionRecord(
+                dna_code=Dna.format_code(self.dna_code_of(i)),
+                phenotype_count=phenotype_count,
+                first_position=' '.join(str(x) for x in first_position),
+                last_position=' '.join(str(x) for x in last_position) if last_position_tracked else EvolutionRecord.UNTRACKED_POSITION,
+                fitness_score=fitness_score,
+                is_elite_from_previous=is_elite_from_previous,
+                died_during_motion=died_during_motion)
+            for i, (phenotype_count, first_position, last_position, last_position_tracked, fitness_score, is_elite_from_previous, died_during_motion)
+            in enumerate(columns)]
+
+    @staticmethod
+    def _positions(positions: List[str]) -> np.ndarray:
+        return np.array([[float(x) for x in position.split(' ')] for position in positions], dtype=np.float64).reshape((-1, 3))
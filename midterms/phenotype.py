@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import List, Optional
 from enum import Enum
 
+import numpy as np
 from numpy import pi
 
 from gene import Gene
@@ -34,25 +35,7 @@ class Phenotype:
 
     @staticmethod
     def parse_dna(gene: Gene, joint_count: int) -> "Phenotype":
-        return Phenotype(
-            link_shape=PhenotypeLinkShape.parse_float(gene.link_shape),
-            link_length=gene.link_length * 2.,
-            link_radius=gene.link_radius * 0.25,
-            link_recurrence=int(gene.link_recurrence * 3),
-            link_mass=gene.link_mass,
-            joint_parent=int(max(0, min(gene.joint_parent, 0.99) * (joint_count-1))) if joint_count > 1 else None,
-            joint_type=PhenotypeJointType.parse_float(gene.joint_type),
-            joint_axis_xyz=PhenotypeJointXYZ.parse_float(gene.joint_axis_xyz),
-            joint_origin_rpy_r=gene.joint_origin_rpy_r * 2*pi,
-            joint_origin_rpy_p=gene.joint_origin_rpy_p * 2*pi,
-            joint_origin_rpy_y=gene.joint_origin_rpy_y * 2*pi,
-            joint_origin_xyz_x=gene.joint_origin_xyz_x * 0.5,
-            joint_origin_xyz_y=gene.joint_origin_xyz_y * 0.5,
-            joint_origin_xyz_z=gene.joint_origin_xyz_z * 0.5,
-            control_waveform=PhenotypeWaveForm.parse_float(gene.control_waveform),
-            control_amp=gene.control_amp * 5.,
-            control_freq=gene.control_freq
-        )
+        return PhenotypeColumns.decode(gene.code.reshape((1, Gene.length())), joint_counts=np.array([joint_count])).to_phenotypes()[0]
 
 
 class PhenotypeLinkShape(Enum):
@@ -108,3 +91,109 @@ class PhenotypeJointXYZ:
             return PhenotypeJointXYZ(x=0, y=1, z=0)
         else:
             return PhenotypeJointXYZ(x=0, y=0, z=1)
+
+
+@dataclass(frozen=True)
+class PhenotypeColumns:
+    """
+    The phenotypes decoded from a matrix of genes (one row per gene, possibly
+    stacked from several creatures), as one array per feature.
+    Enumerations are kept as indices into the `*_VALUES` of this class,
+    and `joint_parent` is -1 where the phenotype has no parent.
+    """
+    link_shape: np.ndarray
+    link_length: np.ndarray
+    link_radius: np.ndarray
+    link_recurrence: np.ndarray
+    link_mass: np.ndarray
+    joint_parent: np.ndarray
+    joint_type: np.ndarray
+    joint_axis_xyz: np.ndarray
+    joint_origin_rpy_r: np.ndarray
+    joint_origin_rpy_p: np.ndarray
+    joint_origin_rpy_y: np.ndarray
+    joint_origin_xyz_x: np.ndarray
+    joint_origin_xyz_y: np.ndarray
+    joint_origin_xyz_z: np.ndarray
+    control_waveform: np.ndarray
+    control_amp: np.ndarray
+    control_freq: np.ndarray
+
+    LINK_SHAPE_VALUES = [PhenotypeLinkShape.CYLINDER, PhenotypeLinkShape.SPHERE]
+    JOINT_TYPE_VALUES = [PhenotypeJointType.FIXED, PhenotypeJointType.REVOLUTE]
+    JOINT_AXIS_XYZ_VALUES = [PhenotypeJointXYZ(x=1, y=0, z=0), PhenotypeJointXYZ(x=0, y=1, z=0), PhenotypeJointXYZ(x=0, y=0, z=1)]
+    CONTROL_WAVEFORM_VALUES = [PhenotypeWaveForm.PULSE, PhenotypeWaveForm.SINE]
+
+    @staticmethod
+    def decode(matrix: np.ndarray, joint_counts: np.ndarray) -> "PhenotypeColumns":
+        """
+        Decodes every row of the `(n, 18)` matrix of genes at once, with the same thresholds
+        and scales as the `parse_float` of each enumeration. The `joint_counts` are the
+        1-based positions of each gene among the genes expressed by its creature.
+        """
+        m = np.asarray(matrix, dtype=np.float64)
+        counts = np.asarray(joint_counts, dtype=np.int64)
+        joint_parent = np.maximum(0, np.minimum(m[:, Gene.JOINT_PARENT], 0.99) * (counts - 1)).astype(np.int64)
+        return PhenotypeColumns(
+            link_shape=(m[:, Gene.LINK_SHAPE] > 0.75).astype(np.int64),
+            link_length=m[:, Gene.LINK_LENGTH] * 2.,
+            link_radius=m[:, Gene.LINK_RADIUS] * 0.25,
+            link_recurrence=(m[:, Gene.LINK_RECURRENCE] * 3).astype(np.int64),
+            link_mass=m[:, Gene.LINK_MASS],
+            joint_parent=np.where(counts > 1, joint_parent, -1),
+            joint_type=(m[:, Gene.JOINT_TYPE] > 0.5).astype(np.int64),
+            joint_axis_xyz=np.searchsorted([0.33, 0.66], m[:, Gene.JOINT_AXIS_XYZ], side="left"),
+            joint_origin_rpy_r=m[:, Gene.JOINT_ORIGIN_RPY_R] * 2*pi,
+            joint_origin_rpy_p=m[:, Gene.JOINT_ORIGIN_RPY_P] * 2*pi,
+            joint_origin_rpy_y=m[:, Gene.JOINT_ORIGIN_RPY_Y] * 2*pi,
+            joint_origin_xyz_x=m[:, Gene.JOINT_ORIGIN_XYZ_X] * 0.5,
+            joint_origin_xyz_y=m[:, Gene.JOINT_ORIGIN_XYZ_Y] * 0.5,
+            joint_origin_xyz_z=m[:, Gene.JOINT_ORIGIN_XYZ_Z] * 0.5,
+            control_waveform=(m[:, Gene.CONTROL_WAVEFORM] > 0.5).astype(np.int64),
+            control_amp=m[:, Gene.CONTROL_AMP] * 5.,
+            control_freq=m[:, Gene.CONTROL_FREQ])
+
+    def __len__(self) -> int:
+        return len(self.link_shape)
+
+    def to_phenotypes(self) -> List[Phenotype]:
+        columns = zip(
+            self.link_shape.tolist(),
+            self.link_length.tolist(),
+            self.link_radius.tolist(),
+            self.link_recurrence.tolist(),
+            self.link_mass.tolist(),
+            self.joint_parent.tolist(),
+            self.joint_type.tolist(),
+            self.joint_axis_xyz.tolist(),
+            self.joint_origin_rpy_r.tolist(),
+            self.joint_origin_rpy_p.tolist(),
+            self.joint_origin_rpy_y.tolist(),
+            self.joint_origin_xyz_x.tolist(),
+            self.joint_origin_xyz_y.tolist(),
+            self.joint_origin_xyz_z.tolist(),
+            self.control_waveform.tolist(),
+            self.control_amp.tolist(),
+            self.control_freq.tolist())
+        return [
+            Phenotype(
+                link_shape=PhenotypeColumns.LINK_SHAPE_VALUES[link_shape],
+                link_length=link_length,
+                link_radius=link_radius,
+                link_recurrence=link_recurrence,
+                link_mass=link_mass,
+                joint_parent=joint_parent if joint_parent >= 0 else None,
+                joint_type=PhenotypeColumns.JOINT_TYPE_VALUES[joint_type],
+                joint_axis_xyz=PhenotypeColumns.JOINT_AXIS_XYZ_VALUES[joint_axis_xyz],
+                joint_origin_rpy_r=rpy_r,
+                joint_origin_rpy_p=rpy_p,
+                joint_origin_rpy_y=rpy_y,
+                joint_origin_xyz_x=xyz_x,
+                joint_origin_xyz_y=xyz_y,
+                joint_origin_xyz_z=xyz_z,
+                control_waveform=PhenotypeColumns.CONTROL_WAVEFORM_VALUES[control_waveform],
+                control_amp=control_amp,
+                control_freq=control_freq)
+            for (link_shape, link_length, link_radius, link_recurrence, link_mass, joint_parent, joint_type, joint_axis_xyz,
+                 rpy_r, rpy_p, rpy_y, xyz_x, xyz_y, xyz_z, control_waveform, control_amp, control_freq)
+            in columns]
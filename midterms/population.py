@@ -1,3 +1,5 @@
+import dataclasses
+from dataclasses import dataclass
 from typing import Dict, List, Iterable, Tuple, Optional
 
 import numpy as np
@@ -5,68 +7,137 @@ import numpy as np
 from primordial_soup import PrimordialSoup
 from dna import Dna
 from creature import Creature
+from selection import SelectionStrategy, RouletteSelection
+
+
+@dataclass(frozen=True)
+class PopulationColumns:
+    """
+    The creatures of a population as parallel arrays, one entry per creature,
+    with the DNA of all of them laid out in `dna_bases` and split by `dna_offsets`.
+    """
+    ids: np.ndarray
+    fitness: np.ndarray
+    lethal: np.ndarray
+    dna_bases: np.ndarray
+    dna_offsets: np.ndarray
+
+    @staticmethod
+    def from_creatures(creatures: List[Creature]) -> "PopulationColumns":
+        dna_codes = [np.asarray(c.dna.code, dtype=np.float64) for c in creatures]
+        return PopulationColumns(
+            # lower 64 bits of the unique id, which is a 128 bits uuid
+            ids=np.array([c._unique_id & 0xFFFFFFFFFFFFFFFF for c in creatures], dtype=np.uint64),
+            fitness=PopulationColumns.fitness_of(creatures),
+            lethal=PopulationColumns.lethal_of(creatures),
+            dna_bases=np.concatenate(dna_codes) if dna_codes else np.empty(0, dtype=np.float64),
+            dna_offsets=np.concatenate([[0], np.cumsum([len(code) for code in dna_codes], dtype=np.int64)]))
+
+    @staticmethod
+    def fitness_of(creatures: List[Creature]) -> np.ndarray:
+        return np.array([c.movement.distance for c in creatures], dtype=np.float64)
+
+    @staticmethod
+    def lethal_of(creatures: List[Creature]) -> np.ndarray:
+        return np.array([c.movement.lethal_move for c in creatures], dtype=bool)
+
+    def dna_code_of(self, index: int) -> np.ndarray:
+        return self.dna_bases[self.dna_offsets[index]:self.dna_offsets[index + 1]]
 
 
 class Population:
     id: int
     creatures: List[Creature]
+    _columns: Optional[PopulationColumns]
 
     @staticmethod
-    def populate_for(size: int, gene_count: int, threshold_for_expression: float) -> "Population":
+    def populate_for(size: int, gene_count: int, threshold_for_expression: float, rng: Optional[np.random.Generator] = None) -> "Population":
+        rng = rng or np.random.default_rng()
         viable_creatures: List[Creature] = []
         while len(viable_creatures) < size:
-            dna_code = PrimordialSoup.spark_life(gene_count=gene_count)
+            dna_code = PrimordialSoup.spark_life(gene_count=gene_count, rng=rng)
             creature = Creature.develop_from(dna=Dna.parse_dna(dna_code), threshold_for_expression=threshold_for_expression)
             if creature:
                 viable_creatures.append(creature)
         return Population(viable_creatures)
 
     def __init__(self, creatures: Iterable[Creature]) -> None:
-        self.creatures = sorted(set(creatures))
+        # the same creature may be passed twice (e.g.: the elite), but distinct
+        # creatures are never compared, as that walks their whole dna and body
+        self.creatures = list({id(c): c for c in creatures}.values())
+        self._columns = None
+
+    @property
+    def columns(self) -> PopulationColumns:
+        """
+        Columns built from the creatures the first time they are needed,
+        with their fitness and lethality read again on `refresh`, once the creatures have moved.
+        """
+        if self._columns is None:
+            self._columns = PopulationColumns.from_creatures(self.creatures)
+        return self._columns
+
+    def refresh(self):
+        """
+        Reads the fitness and lethality of the creatures again, after they were simulated
+        (or restored). The DNA never changes, so its columns are kept.
+        """
+        if self._columns is not None:
+            self._columns = dataclasses.replace(
+                self._columns,
+                fitness=PopulationColumns.fitness_of(self.creatures),
+                lethal=PopulationColumns.lethal_of(self.creatures))
 
     @property
     def fittest(self) -> Optional[Creature]:
         """
         Calculates the fitest of a population with the information available in the tracking system.
         """
-        creatures = [c for c in self.creatures if not c.movement.lethal_move]
-        if not creatures:
+        columns = self.columns
+        if columns.lethal.all():
             return None
         else:
-            dists = np.array([c.movement.distance for c in creatures])
-            winner = np.argmax(dists)
-            return creatures[winner]
+            winner = np.argmax(np.where(columns.lethal, -np.inf, columns.fitness))
+            return self.creatures[winner]
 
-    def next_roulette_pair(self) -> Tuple[Optional[Creature], Optional[Creature]]:
+    def next_roulette_pair(self, rng: Optional[np.random.Generator] = None) -> Tuple[Optional[Creature], Optional[Creature]]:
         """ 
         Using the fitness map, select randomly two parents,
         with odds proportional to their fitness.
         """
-        creatures = [c for c in self.creatures if not c.movement.lethal_move]
-        if not creatures:
+        pairs = self.sample_pairs(1, rng)
+        if not len(pairs):
             return None, None
         else:
-            fm = Population._calculate_fitness_map(creatures)
-            return Population._select_parent(creatures, fm), Population._select_parent(creatures, fm)
+            adam, eve = pairs[0]
+            return self.creatures[adam], self.creatures[eve]
+
+    def sample_pairs(
+            self,
+            k: int,
+            rng: Optional[np.random.Generator] = None,
+            strategy: Optional[SelectionStrategy] = None) -> np.ndarray:
+        """
+        Selects `k` pairs of parents at once, using the selection strategy (roulette by default),
+        returning their indices in `creatures` as an array of shape `(k, 2)`.
+        Lethal creatures are never selected, and no pair is returned if all of them are.
+        """
+        candidates, fitness = self._selection_index()
+        if not len(candidates):
+            return np.empty((0, 2), dtype=int)
+        rng = rng or np.random.default_rng()
+        strategy = strategy or RouletteSelection()
+        return candidates[strategy.select(fitness, 2 * k, rng)].reshape((k, 2))
+
+    def _selection_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        columns = self.columns
+        candidates = np.flatnonzero(~columns.lethal)
+        return candidates, columns.fitness[candidates]
 
     @staticmethod
     def _calculate_fitness_map(creatures: List[Creature]) -> List[float]:
-        out: List[float] = []
-        total = 0.
-        if all([c.movement.last is None for c in creatures]):
-            uniform = 1. / len(creatures)
-            out.extend([(i+1) * uniform for i in range(len(creatures))])
-        else:
-            for creature in creatures:
-                total += creature.movement.distance
-                out.append(total)
-        return out
+        return SelectionStrategy.fitness_map(Population._fitness_of(creatures)).tolist()
 
     @staticmethod
-    def _select_parent(creatures: List[Creature], fm: List[float]) -> Creature:
-        r = np.random.rand()
-        r *= fm[-1]
-        for i in range(len(fm)):
-            if r <= fm[i]:
-                return creatures[i]
-        raise IndexError(f"The random '{r}' could not be found in the fitness map: {','.join([str(f) for f in fm])}")
+    def _fitness_of(creatures: List[Creature]) -> np.ndarray:
+        return np.array([c.movement.distance for c in creatures], dtype=np.float64)
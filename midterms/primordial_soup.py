@@ -1,8 +1,7 @@
 from audioop import bias
-from typing import List
+from typing import List, Optional
 
-import itertools
-import random
+import numpy as np
 
 from gene import Gene
 
@@ -10,10 +9,10 @@ from gene import Gene
 class PrimordialSoup:
 
     @staticmethod
-    def spark_life(gene_count: int) -> List[float]:
-        genes = [PrimordialSoup.spark_gene() for _ in range(gene_count)]
-        return list(itertools.chain(*genes))
+    def spark_life(gene_count: int, rng: Optional[np.random.Generator] = None) -> List[float]:
+        rng = rng or np.random.default_rng()
+        return rng.random(gene_count * Gene.length()).tolist()
 
     @staticmethod
-    def spark_gene() -> List[float]:
-        return [random.random() for _ in range(Gene.length())]
+    def spark_gene(rng: Optional[np.random.Generator] = None) -> List[float]:
+        return PrimordialSoup.spark_life(gene_count=1, rng=rng)
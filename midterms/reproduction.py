@@ -1,68 +1,112 @@
-from dataclasses import dataclass
-from typing import List
-
-import random
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple, Union
 
 import numpy as np
 
 from hyperparams import Hyperparams
 from gene import Gene
 
+# the bases of a DNA, either as read from its text or as the array of a `Dna`
+DnaCode = Union[Sequence[float], np.ndarray]
+
 
 @dataclass(eq=True, frozen=True, order=True)
 class Reproduction:
+    """
+    Produces the DNA of offspring from pairs of parents, through crossover followed by
+    point, shrink and grow mutations. The operators work on the DNA of all offspring at once,
+    laid out as a single flat array of bases split into segments by `offsets`.
+    """
     hyperparams: Hyperparams
+    rng: np.random.Generator = field(default_factory=np.random.default_rng, compare=False)
+
+    def reproduce(self, a: DnaCode, b: DnaCode) -> List[float]:
+        return self.reproduce_all([(a, b)])[0]
 
-    def reproduce(self, a: List[float], b: List[float]) -> List[float]:
-        dna_code = self._crossover(np.array(a), np.array(b))
-        dna_code = self._point_mutate(dna_code)
-        dna_code = self._mutate_shrink(dna_code)
-        dna_code = self._mutate_grow(dna_code)
-        dna_code = self._clip_dna_len(dna_code)
-        return dna_code.tolist()
+    def reproduce_all(self, parents: Sequence[Tuple[DnaCode, DnaCode]]) -> List[List[float]]:
+        """
+        Produces the DNA code of one child for each pair of parents, in a single pass.
+        """
+        if not parents:
+            return []
+        bases, offsets = self._crossover_all(parents)
+        bases = self._point_mutate_all(bases)
+        bases, offsets = self._mutate_shrink_all(bases, offsets)
+        bases, offsets = self._mutate_grow_all(bases, offsets)
+        bases, offsets = self._clip_dna_len_all(bases, offsets)
+        return [child.tolist() for child in np.split(bases, offsets[1:-1])]
 
     def _crossover(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
-        full = max(len(a), len(b))
-        min_len = Gene.length() // 2
-        cut_min, cut_max = int(full * 0.25), int(full * 0.75)
-        cut = random.randint(cut_min, cut_max)
-        cut_a, cut_b = min(cut, len(a) - min_len), min(cut, len(b) - min_len)
-        child_code = np.concatenate([a[:cut_a], b[cut_b:]])
+        child_code, _ = self._crossover_all([(a, b)])
         return child_code
 
     def _point_mutate(self, before: np.ndarray) -> np.ndarray:
-        after = before.copy()
-        for i in range(len(after)):
-            if random.random() < self.hyperparams.point_mutation_rate:
-                after[i] += self.hyperparams.point_mutation_amount
-                after[i] = min(0.99999, after[i])
-                after[i] = max(0.00001, after[i])
-        return after
+        return self._point_mutate_all(np.asarray(before, dtype=np.float64))
 
     def _mutate_shrink(self, before: np.ndarray) -> np.ndarray:
-        after = before.copy()
-        if len(after) > Gene.length():
-            to_remove: List[int] = []
-            for i in range(len(after)):
-                if len(after) - len(to_remove) <= Gene.length():
-                    break
-                if random.random() < self.hyperparams.shrink_mutation_rate:
-                    to_remove.append(i)
-            for i in reversed(to_remove):
-                after = np.delete(after, i, 0)
+        after, _ = self._mutate_shrink_all(*Reproduction._single_segment(before))
         return after
 
     def _mutate_grow(self, before: np.ndarray) -> np.ndarray:
-        after = before.copy()
-        growth = int(len(after) * self.hyperparams.grow_mutation_rate)
-        if growth:
-            new_bases = np.random.rand(growth)
-            after = np.concatenate([after, new_bases])
+        after, _ = self._mutate_grow_all(*Reproduction._single_segment(before))
         return after
 
     def _clip_dna_len(self, dna_code: np.ndarray) -> np.ndarray:
-        gen_count_max = self.hyperparams.gene_count_max
-        max_len = gen_count_max * Gene.length()
-        if len(dna_code) > max_len:
-            dna_code = dna_code[:max_len]
-        return dna_code
+        clipped, _ = self._clip_dna_len_all(*Reproduction._single_segment(dna_code))
+        return clipped
+
+    def _crossover_all(self, parents: Sequence[Tuple[DnaCode, DnaCode]]) -> Tuple[np.ndarray, np.ndarray]:
+        adams = [np.asarray(a, dtype=np.float64) for a, _ in parents]
+        eves = [np.asarray(b, dtype=np.float64) for _, b in parents]
+        len_a = np.array([len(a) for a in adams])
+        len_b = np.array([len(b) for b in eves])
+        full = np.maximum(len_a, len_b)
+        min_len = Gene.length() // 2
+        cut = self.rng.integers((full * 0.25).astype(int), (full * 0.75).astype(int) + 1)
+        cut_a, cut_b = np.minimum(cut, len_a - min_len), np.minimum(cut, len_b - min_len)
+        pieces = [piece for a, b, ca, cb in zip(adams, eves, cut_a, cut_b) for piece in (a[:ca], b[cb:])]
+        lengths = np.array([len(a[:ca]) + len(b[cb:]) for a, b, ca, cb in zip(adams, eves, cut_a, cut_b)])
+        return np.concatenate(pieces), Reproduction._offsets_from(lengths)
+
+    def _point_mutate_all(self, before: np.ndarray) -> np.ndarray:
+        after = before.copy()
+        mutated = self.rng.random(len(after)) < self.hyperparams.point_mutation_rate
+        after[mutated] = np.clip(after[mutated] + self.hyperparams.point_mutation_amount, 0.00001, 0.99999)
+        return after
+
+    def _mutate_shrink_all(self, before: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # each segment loses its earliest flagged bases, but never goes below the length of a gene
+        lengths = np.diff(offsets)
+        segments = np.repeat(np.arange(len(lengths)), lengths)
+        flagged = self.rng.random(len(before)) < self.hyperparams.shrink_mutation_rate
+        flagged_so_far = np.cumsum(flagged)
+        flagged_before_segment = np.concatenate([[0], flagged_so_far])[offsets[:-1]]
+        rank = flagged_so_far - flagged_before_segment[segments]
+        allowed = np.maximum(lengths - Gene.length(), 0)
+        removed = flagged & (rank <= allowed[segments])
+        new_lengths = lengths - np.bincount(segments[removed], minlength=len(lengths))
+        return before[~removed], Reproduction._offsets_from(new_lengths)
+
+    def _mutate_grow_all(self, before: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lengths = np.diff(offsets)
+        growth = (lengths * self.hyperparams.grow_mutation_rate).astype(int)
+        if not growth.any():
+            return before.copy(), offsets
+        new_bases = self.rng.random(int(growth.sum()))
+        after = np.insert(before, np.repeat(offsets[1:], growth), new_bases)
+        return after, Reproduction._offsets_from(lengths + growth)
+
+    def _clip_dna_len_all(self, dna_code: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        max_len = self.hyperparams.gene_count_max * Gene.length()
+        lengths = np.diff(offsets)
+        position = np.arange(len(dna_code)) - np.repeat(offsets[:-1], lengths)
+        return dna_code[position < max_len], Reproduction._offsets_from(np.minimum(lengths, max_len))
+
+    @staticmethod
+    def _single_segment(dna_code: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        bases = np.asarray(dna_code, dtype=np.float64)
+        return bases, np.array([0, len(bases)])
+
+    @staticmethod
+    def _offsets_from(lengths: np.ndarray) -> np.ndarray:
+        return np.concatenate([[0], np.cumsum(lengths)]).astype(int)
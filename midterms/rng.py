@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import secrets
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class GenerationStreams:
+    """
+    Independent random number generators used while evolving a single generation,
+    one per purpose, so that drawing more from one never shifts the others.
+    """
+    genesis: np.random.Generator
+    selection: np.random.Generator
+    reproduction: np.random.Generator
+
+
+class RandomStreams:
+    """
+    Tree of random number generators derived from a single seed. Each generation spawns
+    its own streams from the root seed and its id, so runs are reproducible regardless of
+    how many generations run in the same process, or how simulations are split across workers.
+    """
+    seed_sequence: np.random.SeedSequence
+    # the root seed, which reproduces the run when passed back as `seed`
+    entropy: int
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        # without a seed, draws 128 bits from the OS, as `SeedSequence` itself would
+        self.entropy = seed if seed is not None else secrets.randbits(128)
+        self.seed_sequence = np.random.SeedSequence(self.entropy)
+
+    def for_generation(self, generation_id: int) -> GenerationStreams:
+        generation = np.random.SeedSequence(self.entropy, spawn_key=(generation_id,))
+        genesis, selection, reproduction = generation.spawn(3)
+        return GenerationStreams(
+            genesis=np.random.default_rng(genesis),
+            selection=np.random.default_rng(selection),
+            reproduction=np.random.default_rng(reproduction))
+
+    def for_creature(self) -> np.random.Generator:
+        """
+        Generator for sparking creatures outside of an evolution.
+        """
+        return np.random.default_rng(np.random.SeedSequence(self.entropy))
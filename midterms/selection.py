@@ -0,0 +1,119 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+from hyperparams import Hyperparams
+
+
+class SelectionStrategy(ABC):
+    """
+    Selects parents for the next generation, all at once, from the fitness
+    of the candidates (e.g.: the distance travelled by non-lethal creatures).
+    """
+
+    @staticmethod
+    def from_hyperparams(hyperparams: Hyperparams) -> "SelectionStrategy":
+        name = hyperparams.selection_strategy
+        if name == "roulette":
+            return RouletteSelection()
+        elif name == "tournament":
+            return TournamentSelection(size=hyperparams.selection_tournament_size)
+        elif name == "rank":
+            return RankSelection()
+        elif name == "truncation":
+            return TruncationSelection(ratio=hyperparams.selection_truncation_ratio)
+        elif name == "sus":
+            return StochasticUniversalSampling()
+        raise ValueError(f"Unknown selection strategy '{name}', expected one of: {', '.join(SelectionStrategy.names())}")
+
+    @staticmethod
+    def names() -> List[str]:
+        return ["roulette", "tournament", "rank", "truncation", "sus"]
+
+    @abstractmethod
+    def select(self, fitness: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Returns the indices of `n` selected candidates, in the order they should be paired.
+        """
+        pass
+
+    @staticmethod
+    def fitness_map(fitness: np.ndarray) -> np.ndarray:
+        """
+        Cumulative fitness of the candidates, uniform if none of them has any fitness.
+        """
+        fitness = np.asarray(fitness, dtype=np.float64)
+        if not fitness.sum() > 0:
+            return (np.arange(len(fitness)) + 1) * (1. / len(fitness))
+        return np.cumsum(fitness)
+
+
+class RouletteSelection(SelectionStrategy):
+    """
+    Fitness-proportional selection, with one independent spin per parent.
+    """
+
+    def select(self, fitness: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+        fm = SelectionStrategy.fitness_map(fitness)
+        return np.searchsorted(fm, rng.random(n) * fm[-1], side="left")
+
+
+class StochasticUniversalSampling(SelectionStrategy):
+    """
+    Fitness-proportional selection, with a single spin of `n` evenly spaced pointers,
+    which keeps the number of times a candidate is selected close to its expected value.
+    """
+
+    def select(self, fitness: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+        fm = SelectionStrategy.fitness_map(fitness)
+        step = fm[-1] / n
+        pointers = rng.random() * step + step * np.arange(n)
+        selected = np.minimum(np.searchsorted(fm, pointers, side="left"), len(fm) - 1)
+        # pointers select the candidates in order, which would always pair neighbours
+        return rng.permutation(selected)
+
+
+class TournamentSelection(SelectionStrategy):
+    """
+    Each parent is the fittest of `size` candidates drawn at random.
+    """
+    size: int
+
+    def __init__(self, size: int = 3) -> None:
+        assert size > 0
+        self.size = size
+
+    def select(self, fitness: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+        fitness = np.asarray(fitness, dtype=np.float64)
+        contenders = rng.integers(0, len(fitness), size=(n, self.size))
+        winners = np.argmax(fitness[contenders], axis=1)
+        return contenders[np.arange(n), winners]
+
+
+class RankSelection(SelectionStrategy):
+    """
+    Selection proportional to the rank of the candidate (the least fit ranks 1),
+    which keeps the selective pressure independent of the scale of the fitness.
+    """
+
+    def select(self, fitness: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+        ranks = np.empty(len(fitness), dtype=np.float64)
+        ranks[np.argsort(fitness, kind="stable")] = np.arange(len(fitness)) + 1
+        return RouletteSelection().select(ranks, n, rng)
+
+
+class TruncationSelection(SelectionStrategy):
+    """
+    Parents are drawn uniformly from the fittest `ratio` of the candidates.
+    """
+    ratio: float
+
+    def __init__(self, ratio: float = 0.5) -> None:
+        assert 0 < ratio <= 1
+        self.ratio = ratio
+
+    def select(self, fitness: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+        keep = max(1, int(np.ceil(len(fitness) * self.ratio)))
+        fittest = np.argsort(fitness, kind="stable")[::-1][:keep]
+        return fittest[rng.integers(0, keep, size=n)]
@@ -1,15 +1,19 @@
-from typing import List, Tuple, Optional, Union
+from typing import Iterator, List, Sequence, Tuple, Optional, Union
 
+import dataclasses
+import os
 import time
-from pathlib import Path
+import multiprocessing
 
 import pybullet as p
 
 from hyperparams import Hyperparams
 from motor import Motor
+from phenotype import PhenotypeJointType
 from dna import Dna
 from creature import Creature, CreatureMovement
-from creature_renderer import CreatureRenderer
+from creature_builder import CreatureBuilder
+from telemetry import TelemetryRecorder, TelemetryTrace
 
 import logging
 LOGGER = logging.getLogger(__name__)
@@ -23,54 +27,231 @@ class Simulation:
     """
     hyperparams: Hyperparams
     connection_mode: int
+    is_offline: bool
     pid: int
+    setup: "SimulatorSetup"
+    world_state: Optional[int]
+    placed_ids: List[int]
+    placed_count: int
+    telemetry: List[TelemetryTrace]
 
-    def __init__(self, connection_mode: int, hyperparams: Hyperparams):
+    def __init__(self, connection_mode: int, hyperparams: Hyperparams, offline: Optional[bool] = None):
+        """
+        :param offline {bool}: steps the physics as fast as the CPU allows, without real-time semantics,
+        so the same DNA always results in the same movement. Defaults to `True` unless running in GUI mode.
+        """
         self.hyperparams = hyperparams
         self.connection_mode = connection_mode
         self.is_interactive = connection_mode == p.GUI
+        self.is_offline = offline if offline is not None else not self.is_interactive
+        self.telemetry = []
 
     def __enter__(self):
         self.pid = p.connect(self.connection_mode)
+        self._setup_world()
         return self
 
     def __exit__(self, type, value, traceback):
         p.disconnect(physicsClientId=self.pid)
 
-    def simulate(self, creature_data: Union[Creature, str, List[float]], steps: Optional[int] = None):
-        SimulatorSetup(is_interactive=self.is_interactive, pid=self.pid).setup()
-        creature, creature_id = self._place_creature_into(creature_data=creature_data)
-        self._wait_end_of_simulation(creature, creature_id, steps)
+    @staticmethod
+    def max_creatures_per_world() -> int:
+        """
+        Collision shapes cannot be released from the physics engine once used,
+        so the world is fully reset after this many creatures went through it.
+        """
+        return 1000
+
+    def simulate(
+            self,
+            creature_data: Union[Creature, str, List[float]],
+            steps: Optional[int] = None,
+            target_distance: Optional[float] = None) -> Creature:
+        """
+        Simulates a single creature.
+        :param target_distance {float}: the distance of the current elite, used by `simulation_stop_hopeless`.
+        """
+        return self.simulate_batch([creature_data], steps=steps, target_distance=target_distance)[0]
+
+    def simulate_batch(
+            self,
+            creatures_data: Sequence[Union[Creature, str, List[float]]],
+            steps: Optional[int] = None,
+            target_distance: Optional[float] = None) -> List[Creature]:
+        """
+        Simulates several creatures together in the same world. They are placed at the same spot,
+        but only collide with the ground, so each one moves exactly as it would if simulated alone.
+        """
+        self._clear_world()
+        placed = [self._place_creature_into(creature_data=creature_data) for creature_data in creatures_data]
+        self.placed_ids = [creature_id for _, creature_id in placed]
+        self.placed_count += len(placed)
+        if len(placed) > 1:
+            self.setup.isolate(self.placed_ids)
+        self._wait_end_of_simulation(placed, steps, target_distance)
+        return [creature for creature, _ in placed]
+
+    def simulate_all(
+            self,
+            creatures: List[Creature],
+            steps: Optional[int] = None,
+            target_distance: Optional[float] = None) -> Iterator[Creature]:
+        """
+        Simulates the creatures in batches of `simulation_batch_size`, yielding each one as soon as its movement is tracked.
+        The elite to catch up with remains `target_distance` throughout, as in `SimulationPool`, so that
+        the movement of a creature does not depend on the order (nor the mode) it was simulated in.
+        """
+        batch_size = self.hyperparams.simulation_batch_size
+        for i in range(0, len(creatures), batch_size):
+            for creature in self.simulate_batch(creatures[i:i+batch_size], steps=steps, target_distance=target_distance):
+                yield creature
+
+    def drain_telemetry(self) -> List[TelemetryTrace]:
+        """
+        Hands over the telemetry recorded since last drained (see `simulation_telemetry_interval`).
+        """
+        telemetry, self.telemetry = self.telemetry, []
+        return telemetry
+
+    def _setup_world(self):
+        self.setup = SimulatorSetup(is_interactive=self.is_interactive, hyperparams=self.hyperparams, pid=self.pid)
+        self.setup.setup()
+        self.world_state = p.saveState(physicsClientId=self.pid) if self.hyperparams.simulation_restore_state else None
+        self.placed_ids = []
+        self.placed_count = 0
+
+    def _clear_world(self):
+        """
+        Removes the creatures of the previous simulation, bringing the world back to its empty state
+        without paying for a full reset (and the recreation of the ground) every time.
+        """
+        if self.placed_count >= Simulation.max_creatures_per_world():
+            self._setup_world()
+            return
+        for creature_id in self.placed_ids:
+            p.removeBody(creature_id, physicsClientId=self.pid)
+        self.placed_ids = []
+        if self.world_state is not None:
+            p.restoreState(stateId=self.world_state, physicsClientId=self.pid)
+        LOGGER.debug("Simulation, World Cleared")
 
     def _place_creature_into(self, creature_data: Union[Creature, List[float], str]) -> Tuple[Creature, int]:
         creature = creature_data if isinstance(creature_data, Creature) else Creature.develop_from(dna=Dna.parse_dna(creature_data), threshold_for_expression=self.hyperparams.expression_threshold)
         if creature:
             logging.debug(f"Creature, Born with name '{creature.name}'")
-            urdf = CreatureRenderer(creature).render()
-            filename = Path(f'/tmp/evo-{creature.name}.urdf')
-            filename.write_text(urdf)
-            creature_id = p.loadURDF(str(filename), physicsClientId=self.pid)
+            creature_id = CreatureBuilder(creature, pid=self.pid, with_visuals=self.is_interactive).build()
             p.resetBasePositionAndOrientation(creature_id, list(creature.movement.reset()), [0, 0, 0, 1], physicsClientId=self.pid)
             LOGGER.debug(f"Simulation, Bot #{creature_id} Loaded")
             return creature, creature_id
         else:
             raise Exception(F"DNA could not generate a creature: {creature_data}")
 
-    def _wait_end_of_simulation(self, creature: Creature, creature_id: int, steps: Optional[int]):
-        SimulationRunner(
-            self.is_interactive,
-            creature=creature,
-            creature_id=creature_id,
-            steps=steps,
-            pid=self.pid).run()
+    def _wait_end_of_simulation(self, placed: List[Tuple[Creature, int]], steps: Optional[int], target_distance: Optional[float]):
+        runners = [
+            SimulationRunner(
+                self.is_interactive,
+                is_offline=self.is_offline,
+                hyperparams=self.hyperparams,
+                creature=creature,
+                creature_id=creature_id,
+                steps=steps,
+                pid=self.pid,
+                target_distance=target_distance)
+            for creature, creature_id
+            in placed]
+        if len(runners) == 1:
+            runners[0].run()
+        else:
+            SimulationBatchRunner(runners, is_offline=self.is_offline, steps=steps, pid=self.pid).run()
+        for runner in runners:
+            if runner.telemetry is not None:
+                self.telemetry.append(runner.telemetry.trace(runner.creature.name or ""))
+
+
+class SimulationPool:
+    """
+    Carries out the fitness test of creatures in parallel, using a pool of worker processes
+    that own each their long-lived `p.DIRECT` simulation. Workers receive the DNA code of the
+    creatures and ship back their `CreatureMovement`, which is restored into the original creature.
+    """
+    hyperparams: Hyperparams
+    processes: int
+    telemetry: List[TelemetryTrace]
+
+    def __init__(self, hyperparams: Hyperparams, processes: Optional[int] = None):
+        self.hyperparams = hyperparams
+        self.processes = processes or os.cpu_count() or 1
+        self.telemetry = []
+
+    def __enter__(self):
+        self.pool = multiprocessing.Pool(
+            processes=self.processes,
+            initializer=_initialise_worker,
+            initargs=(self.hyperparams,))
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.pool.close()
+        else:
+            self.pool.terminate()
+        self.pool.join()
+
+    def simulate_all(
+            self,
+            creatures: List[Creature],
+            steps: Optional[int] = None,
+            target_distance: Optional[float] = None) -> Iterator[Creature]:
+        """
+        Simulates the creatures across the workers, yielding each one (in order) once its movement is tracked.
+        Workers do not share their results, so the elite to catch up with remains `target_distance` throughout.
+        """
+        batch_size = self.hyperparams.simulation_batch_size
+        batches = [creatures[i:i+batch_size] for i in range(0, len(creatures), batch_size)]
+        tasks = [([creature.dna.code for creature in batch], steps, target_distance) for batch in batches]
+        chunksize = max(1, len(tasks) // (self.processes * 4))
+        batches_results = self.pool.imap(_simulate_in_worker, tasks, chunksize=chunksize)
+        for batch, (movements, traces) in zip(batches, batches_results):
+            # workers develop their own copy of the creatures, named differently
+            self.telemetry.extend(dataclasses.replace(trace, creature_name=creature.name) for creature, trace in zip(batch, traces))
+            for creature, movement in zip(batch, movements):
+                creature.movement.restore(movement)
+                yield creature
+
+    def drain_telemetry(self) -> List[TelemetryTrace]:
+        """
+        Hands over the telemetry shipped back by the workers since last drained.
+        """
+        telemetry, self.telemetry = self.telemetry, []
+        return telemetry
+
+
+_WORKER_SIMULATION: Optional[Simulation] = None
+
+
+def _initialise_worker(hyperparams: Hyperparams):
+    # the connection lives for as long as the worker process does,
+    # and is released by the physics server when the process exits.
+    global _WORKER_SIMULATION
+    _WORKER_SIMULATION = Simulation(connection_mode=p.DIRECT, hyperparams=hyperparams).__enter__()
+
+
+def _simulate_in_worker(task: Tuple[List[List[float]], Optional[int], Optional[float]]) -> Tuple[List[CreatureMovement], List[TelemetryTrace]]:
+    assert _WORKER_SIMULATION
+    dna_codes, steps, target_distance = task
+    creatures = _WORKER_SIMULATION.simulate_batch(dna_codes, steps=steps, target_distance=target_distance)
+    return [creature.movement for creature in creatures], _WORKER_SIMULATION.drain_telemetry()
 
 
 class SimulatorSetup:
     is_interactive: bool
+    hyperparams: Hyperparams
     pid: int
+    ground_id: int
 
-    def __init__(self, is_interactive: bool, pid: int):
+    def __init__(self, is_interactive: bool, hyperparams: Hyperparams, pid: int):
         self.is_interactive = is_interactive
+        self.hyperparams = hyperparams
         self.pid = pid
 
     def setup(self):
@@ -85,73 +266,180 @@ class SimulatorSetup:
 
     def _setup_engine(self):
         p.resetSimulation(physicsClientId=self.pid)
-        p.setPhysicsEngineParameter(enableFileCaching=0, physicsClientId=self.pid)
+        p.setPhysicsEngineParameter(
+            enableFileCaching=0,
+            fixedTimeStep=self.hyperparams.simulation_timestep,
+            numSubSteps=self.hyperparams.simulation_substeps,
+            deterministicOverlappingPairs=1,
+            physicsClientId=self.pid)
         p.setGravity(0, 0, -10, physicsClientId=self.pid)
         LOGGER.debug("Simulation, Engine Ready")
 
     def _setup_ground(self):
         shape = p.createCollisionShape(p.GEOM_PLANE, physicsClientId=self.pid)
-        p.createMultiBody(shape, shape, physicsClientId=self.pid)
+        self.ground_id = p.createMultiBody(shape, shape, physicsClientId=self.pid)
         LOGGER.debug("Simulation, Ground Instantiated")
 
+    def isolate(self, creature_ids: List[int]):
+        """
+        Filters collisions so that creatures sharing the world only collide with the ground.
+        The ground is in group 1 colliding with everything, creatures in group 2 colliding with group 1 only.
+        """
+        p.setCollisionFilterGroupMask(self.ground_id, -1, 1, -1, physicsClientId=self.pid)
+        for creature_id in creature_ids:
+            for link_id in range(-1, p.getNumJoints(creature_id, physicsClientId=self.pid)):
+                p.setCollisionFilterGroupMask(creature_id, link_id, 2, 1, physicsClientId=self.pid)
+        LOGGER.debug(f"Simulation, {len(creature_ids)} Creatures Isolated")
+
 
 class SimulationRunner:
     is_interactive: bool
+    is_offline: bool
+    hyperparams: Hyperparams
     creature: Creature
     creature_id: int
     steps: Optional[int]
     pid: int
+    target_distance: Optional[float]
+    motor_joint_indices: List[int]
+    motors: List[Motor]
+    telemetry: Optional[TelemetryRecorder]
 
     def __init__(
             self,
             is_interactive: bool,
+            is_offline: bool,
+            hyperparams: Hyperparams,
             creature: Creature,
             creature_id: int,
             steps: Optional[int],
-            pid: int) -> None:
+            pid: int,
+            target_distance: Optional[float] = None) -> None:
         self.is_interactive = is_interactive
+        self.is_offline = is_offline
+        self.hyperparams = hyperparams
         self.creature = creature
         self.creature_id = creature_id
         self.pid = pid
         self.steps = steps
+        self.target_distance = target_distance
+        self.motor_joint_indices, self.motors = self._resolve_motors()
+        self.motor_forces = [5.] * len(self.motors)
+        self.stall_anchor: Tuple[int, Tuple[float, float, float]] = (0, creature.movement.initial)
+        # the initial position counts as tracked right before the first step
+        self.tracked_step = -1
+        self.telemetry = self._create_telemetry_recorder()
+
+    def _create_telemetry_recorder(self) -> Optional[TelemetryRecorder]:
+        if self.hyperparams.simulation_telemetry_interval <= 0:
+            return None
+        return TelemetryRecorder(
+            capacity=self.hyperparams.simulation_telemetry_samples,
+            joint_count=p.getNumJoints(self.creature_id, physicsClientId=self.pid))
+
+    def _resolve_motors(self) -> Tuple[List[int], List[Motor]]:
+        """
+        Maps each revolute joint (in link order) to the motor of the part it moves,
+        so motors keep their phase across steps and joints are only resolved once.
+        """
+        joint_indices: List[int] = []
+        motors: List[Motor] = []
+        for jid, part in enumerate(self.creature.body.flatten()[1:]):
+            if part.phenotype.joint_type == PhenotypeJointType.REVOLUTE:
+                joint_indices.append(jid)
+                motors.append(Motor.generate_from(part.phenotype))
+        return joint_indices, motors
 
     def run(self):
-        p.setRealTimeSimulation(1, physicsClientId=self.pid)
+        p.setRealTimeSimulation(0 if self.is_offline else 1, physicsClientId=self.pid)
         try:
             LOGGER.debug("Simulation, Iterative Loop Starting Now")
             i = 0
             while self.steps is None or i < self.steps:
                 self._run_simulation_step(step=i)
-                self._update_creature_motors()
-                self._track_crature_movement()
+                if not self.tick(step=i):
+                    LOGGER.debug(f"Simulation, Iterative Loop, Stopped Early at Step: {i}")
+                    break
                 self._wait_if_interactive()
                 i += 1
-            LOGGER.debug(f"Simulation, Iterative Loop, Completed Steps: {self.steps}")
+            LOGGER.debug(f"Simulation, Iterative Loop, Completed Steps: {i}")
         except p.error as e:
             LOGGER.debug("The simulation has been interrupted")
             pass
 
+    def tick(self, step: int) -> bool:
+        """
+        Drives and tracks the creature after the physics has been stepped,
+        returning whether it should keep being simulated.
+        """
+        if self._is_motor_tick(step=step):
+            self._update_creature_motors()
+        if self.telemetry is not None and step % self.hyperparams.simulation_telemetry_interval == 0:
+            self._record_telemetry(step=step)
+        if self._is_tracking_tick(step=step):
+            self._track_crature_movement(step=step)
+            if self._should_stop_early(step=step):
+                return False
+        return True
+
     def _run_simulation_step(self, step: int):
         if self.steps and not self.is_interactive:
             LOGGER.debug(f"Simulation, Step {step} out of {self.steps if self.steps else '∞'}")
         p.stepSimulation(physicsClientId=self.pid)
 
+    def _is_motor_tick(self, step: int) -> bool:
+        return step % self.hyperparams.simulation_motor_interval == 0
+
+    def _is_tracking_tick(self, step: int) -> bool:
+        # the very last step is always tracked, so the final position is never missed
+        is_last_step = self.steps is not None and step == self.steps - 1
+        return is_last_step or step % self.hyperparams.simulation_tracking_interval == 0
+
+    def _should_stop_early(self, step: int) -> bool:
+        """
+        Checks the early termination policies, which only apply when the simulation is not interactive.
+        """
+        if self.is_interactive:
+            return False
+        return self._is_dead() or self._is_stalled(step) or self._is_hopeless(step)
+
+    def _is_dead(self) -> bool:
+        return self.hyperparams.simulation_stop_on_lethal and self.creature.movement.lethal_move
+
+    def _is_stalled(self, step: int) -> bool:
+        if self.hyperparams.simulation_stall_steps <= 0 or not self.creature.movement.last:
+            return False
+        anchor_step, anchor_position = self.stall_anchor
+        if CreatureMovement.calculate_dist(anchor_position, self.creature.movement.last) > self.hyperparams.simulation_stall_epsilon:
+            self.stall_anchor = (step, self.creature.movement.last)
+            return False
+        return step - anchor_step >= self.hyperparams.simulation_stall_steps
+
+    def _is_hopeless(self, step: int) -> bool:
+        # without dying, a creature cannot move further than `max_move` per step,
+        # so the furthest it can still get is bound by the number of steps left.
+        if not self.hyperparams.simulation_stop_hopeless or self.target_distance is None or self.steps is None:
+            return False
+        steps_left = self.steps - 1 - step
+        reachable = self.creature.movement.distance + steps_left * CreatureMovement.max_move()
+        return reachable < self.target_distance
+
     def _update_creature_motors(self):
-        for jid in range(p.getNumJoints(self.creature_id, physicsClientId=self.pid)):
-            phenotype = self.creature.phenotypes[jid+1]
-            motor = Motor.generate_from(phenotype)
-            p.setJointMotorControl2(
+        if self.motors:
+            p.setJointMotorControlArray(
                 self.creature_id,
-                jid,
+                self.motor_joint_indices,
                 controlMode=p.VELOCITY_CONTROL,
-                targetVelocity=next(motor),
-                force=5,
+                targetVelocities=[next(motor) for motor in self.motors],
+                forces=self.motor_forces,
                 physicsClientId=self.pid)
 
-    def _track_crature_movement(self):
+    def _track_crature_movement(self, step: int):
         try:
             pos, _ = p.getBasePositionAndOrientation(self.creature_id, physicsClientId=self.pid)
-            self.creature.movement.track(pos)
+            # the limit of the movement scales with the steps since the previous sample
+            self.creature.movement.track(pos, steps=step - self.tracked_step)
+            self.tracked_step = step
             if self.is_interactive:
                 LOGGER.debug(f"Creature {self.creature.name} now in position {pos}")
                 p.resetDebugVisualizerCamera(cameraDistance=5, cameraYaw=100, cameraPitch=-50, cameraTargetPosition=pos, physicsClientId=self.pid)
@@ -159,6 +447,45 @@ class SimulationRunner:
             if not self.is_interactive:
                 raise e
 
+    def _record_telemetry(self, step: int):
+        assert self.telemetry is not None
+        pos, orn = p.getBasePositionAndOrientation(self.creature_id, physicsClientId=self.pid)
+        joint_states = p.getJointStates(self.creature_id, range(self.telemetry.joint_count), physicsClientId=self.pid) if self.telemetry.joint_count else []
+        self.telemetry.record(step, pos, orn, joint_states)
+
     def _wait_if_interactive(self):
-        if self.is_interactive:
-            time.sleep(1.0/240)
+        if self.is_interactive and not self.is_offline:
+            time.sleep(self.hyperparams.simulation_timestep)
+
+
+class SimulationBatchRunner:
+    """
+    Steps a world shared by several creatures, each one driven and tracked by its own `SimulationRunner`.
+    Creatures that stop early are left in the world (removing them would disturb the others),
+    but are no longer driven nor tracked; the loop ends once all of them have stopped.
+    """
+    runners: List[SimulationRunner]
+    is_offline: bool
+    steps: Optional[int]
+    pid: int
+
+    def __init__(self, runners: List[SimulationRunner], is_offline: bool, steps: Optional[int], pid: int) -> None:
+        self.runners = runners
+        self.is_offline = is_offline
+        self.steps = steps
+        self.pid = pid
+
+    def run(self):
+        p.setRealTimeSimulation(0 if self.is_offline else 1, physicsClientId=self.pid)
+        try:
+            LOGGER.debug(f"Simulation, Batch of {len(self.runners)} Starting Now")
+            active = list(self.runners)
+            i = 0
+            while active and (self.steps is None or i < self.steps):
+                p.stepSimulation(physicsClientId=self.pid)
+                active = [runner for runner in active if runner.tick(step=i)]
+                i += 1
+            LOGGER.debug(f"Simulation, Batch, Completed Steps: {i}")
+        except p.error:
+            LOGGER.debug("The simulation has been interrupted")
+            pass
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class TelemetryTrace:
+    """
+    The samples recorded while simulating a creature, in the order they were taken:
+    the step, the position and orientation (quaternion) of its base,
+    and the position and velocity of each of its joints.
+    """
+    creature_name: str
+    step: np.ndarray
+    base_position: np.ndarray
+    base_orientation: np.ndarray
+    joint_position: np.ndarray
+    joint_velocity: np.ndarray
+    dropped: int = 0
+
+    def __len__(self) -> int:
+        return len(self.step)
+
+    @property
+    def joint_count(self) -> int:
+        return self.joint_position.shape[1]
+
+    @staticmethod
+    def save_all(filepath: Path, traces: Sequence["TelemetryTrace"]):
+        """
+        Saves the traces of many creatures (e.g.: a generation) as a single compressed `.npz`,
+        with the samples of all of them laid out one after the other and split by `sample_offsets`.
+        """
+        sample_counts = [len(trace) for trace in traces]
+        joint_counts = [trace.joint_count for trace in traces]
+        np.savez_compressed(
+            filepath,
+            creature_name=np.array([trace.creature_name for trace in traces], dtype=np.str_),
+            dropped=np.array([trace.dropped for trace in traces], dtype=np.int64),
+            joint_count=np.array(joint_counts, dtype=np.int64),
+            sample_offsets=np.concatenate([[0], np.cumsum(sample_counts, dtype=np.int64)]),
+            step=TelemetryTrace._concatenate([trace.step for trace in traces], dtype=np.int64),
+            base_position=TelemetryTrace._concatenate([trace.base_position for trace in traces]).reshape((-1, 3)),
+            base_orientation=TelemetryTrace._concatenate([trace.base_orientation for trace in traces]).reshape((-1, 4)),
+            joint_position=TelemetryTrace._concatenate([trace.joint_position.ravel() for trace in traces]),
+            joint_velocity=TelemetryTrace._concatenate([trace.joint_velocity.ravel() for trace in traces]))
+
+    @staticmethod
+    def load_all(filepath: Path) -> List["TelemetryTrace"]:
+        traces: List[TelemetryTrace] = []
+        with np.load(filepath, allow_pickle=False) as npz:
+            sample_offsets = npz["sample_offsets"].tolist()
+            joint_counts = npz["joint_count"].tolist()
+            joint_offsets = np.concatenate([[0], np.cumsum(np.diff(sample_offsets) * joint_counts)]).tolist()
+            step, base_position, base_orientation = npz["step"], npz["base_position"], npz["base_orientation"]
+            joint_position, joint_velocity = npz["joint_position"], npz["joint_velocity"]
+            for i, (creature_name, dropped) in enumerate(zip(npz["creature_name"].tolist(), npz["dropped"].tolist())):
+                samples = slice(sample_offsets[i], sample_offsets[i + 1])
+                joints = slice(joint_offsets[i], joint_offsets[i + 1])
+                shape = (sample_offsets[i + 1] - sample_offsets[i], joint_counts[i])
+                traces.append(TelemetryTrace(
+                    creature_name=creature_name,
+                    step=step[samples],
+                    base_position=base_position[samples],
+                    base_orientation=base_orientation[samples],
+                    joint_position=joint_position[joints].reshape(shape),
+                    joint_velocity=joint_velocity[joints].reshape(shape),
+                    dropped=dropped))
+        return traces
+
+    @staticmethod
+    def _concatenate(arrays: List[np.ndarray], dtype=np.float64) -> np.ndarray:
+        return np.concatenate(arrays).astype(dtype, copy=False) if arrays else np.empty(0, dtype=dtype)
+
+
+class TelemetryRecorder:
+    """
+    Records samples of a simulated creature into buffers allocated upfront,
+    which wrap around once `capacity` samples are taken, keeping the most recent ones.
+    """
+    capacity: int
+    joint_count: int
+    count: int
+
+    def __init__(self, capacity: int, joint_count: int) -> None:
+        assert capacity > 0
+        self.capacity = capacity
+        self.joint_count = joint_count
+        self.count = 0
+        self.step = np.zeros(capacity, dtype=np.int64)
+        self.base = np.zeros((capacity, 7), dtype=np.float64)
+        self.joints = np.zeros((capacity, 2, joint_count), dtype=np.float64)
+
+    def record(
+            self,
+            step: int,
+            position: Tuple[float, float, float],
+            orientation: Tuple[float, float, float, float],
+            joint_states: Sequence[Tuple[float, float]]):
+        """
+        :param joint_states: the position and velocity of each joint (extra items, such as the ones of `getJointStates`, are ignored).
+        """
+        i = self.count % self.capacity
+        self.step[i] = step
+        self.base[i, :3] = position
+        self.base[i, 3:] = orientation
+        for j, state in enumerate(joint_states):
+            self.joints[i, 0, j] = state[0]
+            self.joints[i, 1, j] = state[1]
+        self.count += 1
+
+    def trace(self, creature_name: str) -> TelemetryTrace:
+        """
+        Copies the samples out of the buffers, oldest first.
+        """
+        order = np.arange(min(self.count, self.capacity))
+        if self.count > self.capacity:
+            order = (order + self.count) % self.capacity
+        return TelemetryTrace(
+            creature_name=creature_name,
+            step=self.step[order],
+            base_position=self.base[order, :3],
+            base_orientation=self.base[order, 3:],
+            joint_position=self.joints[order, 0],
+            joint_velocity=self.joints[order, 1],
+            dropped=max(0, self.count - self.capacity))
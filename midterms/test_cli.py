@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from contextlib import redirect_stderr
+
+import io
+import tempfile
+
+from cli import collect_args, record_generation
+from hyperparams import Hyperparams
+
+
+class CliTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def collect_args(self, *args: str):
+        argv = ["cli.py", "evolution", "evolve", "--target_folder", self.folder, *args]
+        with patch("sys.argv", argv):
+            return collect_args()
+
+    def test_simulation_stop_on_lethal_by_default(self):
+        self.assertTrue(self.collect_args().simulation_stop_on_lethal)
+
+    def test_simulation_stop_on_lethal_can_be_disabled(self):
+        self.assertFalse(self.collect_args("--no-simulation_stop_on_lethal").simulation_stop_on_lethal)
+        self.assertTrue(self.collect_args("--simulation_stop_on_lethal").simulation_stop_on_lethal)
+
+    def test_simulation_restore_state_can_be_disabled(self):
+        self.assertTrue(self.collect_args().simulation_restore_state)
+        self.assertFalse(self.collect_args("--no-simulation_restore_state").simulation_restore_state)
+
+    def test_simulation_intervals_must_be_at_least_one(self):
+        self.assertEqual(24, self.collect_args("--simulation_tracking_interval", "24").simulation_tracking_interval)
+        for arg in ["--simulation_motor_interval", "--simulation_tracking_interval"]:
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                self.collect_args(arg, "0")
+            args = self.collect_args()
+            setattr(args, arg[2:], 0)
+            with self.assertRaises(ValueError):
+                Hyperparams.from_args(args, gene_count_genesis=3)
+
+    def test_simulation_substeps_stall_and_batch_are_validated(self):
+        self.assertEqual(0, self.collect_args("--simulation_stall_steps", "0").simulation_stall_steps)
+        for arg, value in [("--simulation_substeps", "0"), ("--simulation_stall_steps", "-1"), ("--simulation_batch_size", "0")]:
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                self.collect_args(arg, value)
+            args = self.collect_args()
+            setattr(args, arg[2:], int(value))
+            with self.assertRaises(ValueError):
+                Hyperparams.from_args(args, gene_count_genesis=3)
+
+    def test_simulation_telemetry_is_validated(self):
+        self.assertEqual(0, self.collect_args("--simulation_telemetry_interval", "0").simulation_telemetry_interval)
+        for arg, value in [("--simulation_telemetry_interval", "-1"), ("--simulation_telemetry_samples", "0")]:
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                self.collect_args(arg, value)
+            args = self.collect_args()
+            setattr(args, arg[2:], int(value))
+            with self.assertRaises(ValueError):
+                Hyperparams.from_args(args, gene_count_genesis=3)
+
+    def test_selection_tournament_size_must_be_at_least_one(self):
+        self.assertEqual(2, self.collect_args("--selection_tournament_size", "2").selection_tournament_size)
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            self.collect_args("--selection_tournament_size", "0")
+        args = self.collect_args()
+        args.selection_tournament_size = 0
+        with self.assertRaises(ValueError):
+            Hyperparams.from_args(args, gene_count_genesis=3)
+
+    def test_record_generation_summarises_only_generations_with_an_elite(self):
+        args = self.collect_args()
+        writer = Mock()
+        generation = Mock(elite_offspring=None)
+        record_generation(args, generation, writer, last_score=0.)
+        writer.write_generation.assert_called_once_with(generation)
+        writer.write_summary.assert_not_called()
+        writer.write_dna.assert_not_called()
+        generation = Mock(elite_offspring=Mock(dna_code="0.1,0.2", fitness_score=1.))
+        record_generation(args, generation, writer, last_score=0.)
+        writer.write_summary.assert_called_once_with(generation)
+        writer.write_dna.assert_called_once_with("summary", "0.1,0.2", unique=False)
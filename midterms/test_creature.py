@@ -54,6 +54,23 @@ class CreatureTest(unittest.TestCase):
         creature = Creature.develop_from(dna=dna, threshold_for_expression=0.5)
         self.assertEqual(3, len(creature.body.children[0].children))
 
+    def test_develop_all_matches_developing_one_at_a_time(self):
+        dnas = [Dna.parse_dna([random.random() for _ in range(Gene.length() * random.randint(1, 10))]) for _ in range(20)]
+        dnas.append(self.dna)
+        developed = Creature.develop_all(dnas, threshold_for_expression=0.5)
+        self.assertEqual(len(dnas), len(developed))
+        for dna, creature in zip(dnas, developed):
+            alone = Creature.develop_from(dna=dna, threshold_for_expression=0.5)
+            self.assertEqual(alone is None, creature is None)
+            if creature:
+                self.assertIs(dna, creature.dna)
+                self.assertListEqual(alone.phenotypes, creature.phenotypes)
+                self.assertEqual(alone.body, creature.body)
+
+    def test_develop_all_returns_none_for_dna_without_expression(self):
+        unexpressed = Dna.parse_dna(CreatureTest.create_gene_code(connected_with_index=None, all_parts_count=0, expressable=False))
+        self.assertListEqual([None], Creature.develop_all([unexpressed], threshold_for_expression=0.5))
+
     def test_creature_lethal_movement(self):
         self.assertFalse(self.creature.movement.lethal_move)
         self.creature.movement.track((8, 8, 1))
@@ -61,6 +78,26 @@ class CreatureTest(unittest.TestCase):
         self.creature.movement.track((8, 8, 2))
         self.assertTrue(self.creature.movement.lethal_move)
 
+    def test_smooth_movement_is_not_lethal_regardless_of_tracking_interval(self):
+        path = [(0.05 * step, 0., 5.) for step in range(1, 49)]
+        for interval in [1, 24]:
+            movement = CreatureMovement()
+            for step in range(interval - 1, len(path), interval):
+                movement.track(path[step], steps=interval)
+            self.assertFalse(movement.lethal_move, f"interval {interval}")
+            self.assertAlmostEqual(2.4, movement.distance)
+        movement = CreatureMovement()
+        movement.track(path[23])
+        self.assertTrue(movement.lethal_move)
+
+    def test_creatures_are_sorted_by_key_and_not_by_themselves(self):
+        other = Creature.develop_from(dna=self.dna, threshold_for_expression=0.5)
+        self.creature.movement.track((0., 0.5, 5.))
+        other.movement.track((0., 0.1, 5.))
+        self.assertListEqual([other, self.creature], sorted([self.creature, other], key=lambda c: c.movement.distance))
+        with self.assertRaises(TypeError):
+            sorted([self.creature, other])
+
     def test_lethality_too_high(self):
         self.assertFalse(CreatureMovement.check_lethality((0, 0, 0), (0, 0, 1)))
         self.assertFalse(CreatureMovement.check_lethality((0, 0, 1), (0, 0, 2)))
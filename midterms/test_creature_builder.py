@@ -0,0 +1,60 @@
+from typing import Dict
+
+import unittest
+import random
+
+import pybullet as p
+
+from creature_builder import CreatureBuilder
+from creature import Creature
+from dna import Dna
+from gene import Gene
+
+
+class CreatureBuilderTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.pid = p.connect(p.DIRECT)
+
+    def tearDown(self) -> None:
+        p.disconnect(physicsClientId=self.pid)
+
+    def test_class_exists(self):
+        self.assertIsNotNone(CreatureBuilder)
+
+    def test_build_creature_with_single_link_has_no_joints(self):
+        creature = CreatureBuilderTest._create_creature(connections={})
+        creature_id = CreatureBuilder(creature, pid=self.pid).build()
+        self.assertEqual(0, p.getNumJoints(creature_id, physicsClientId=self.pid))
+
+    def test_build_creature_has_one_joint_per_child_part(self):
+        creature = CreatureBuilderTest._create_creature(connections={1: 0, 2: 0, 3: 1})
+        creature_id = CreatureBuilder(creature, pid=self.pid).build()
+        self.assertEqual(3, p.getNumJoints(creature_id, physicsClientId=self.pid))
+
+    def test_build_creature_links_follow_depth_first_order(self):
+        creature = CreatureBuilderTest._create_creature(connections={1: 0, 2: 0, 3: 1})
+        builder = CreatureBuilder(creature, pid=self.pid)
+        creature_id = builder.build()
+        parents = [p.getJointInfo(creature_id, jid, physicsClientId=self.pid)[16] for jid in range(3)]
+        self.assertListEqual([-1, 0, -1], parents)
+        self.assertEqual(creature.body.children[0].children[0], builder.parts_in_link_order()[2])
+
+    def test_build_creature_link_mass_matches_rendered_urdf(self):
+        creature = CreatureBuilderTest._create_creature(connections={})
+        creature_id = CreatureBuilder(creature, pid=self.pid).build()
+        phenotype = creature.body.phenotype
+        expected = 3.141592653589793 * (phenotype.link_radius * phenotype.link_radius) * phenotype.link_length
+        self.assertAlmostEqual(expected, p.getDynamicsInfo(creature_id, -1, physicsClientId=self.pid)[0])
+
+    @staticmethod
+    def _create_creature(connections: Dict[int, int]) -> Creature:
+        dna_code = []
+        for i in range(len(connections) + 1):
+            gene = [random.random() for _ in range(Gene.length())]
+            gene[5] = (connections[i] / i) if i in connections else 0.
+            gene[-1] = 1.
+            dna_code.extend(gene)
+        creature = Creature.develop_from(dna=Dna.parse_dna(dna_code), threshold_for_expression=0.5)
+        assert creature
+        return creature
@@ -1,6 +1,9 @@
 import unittest
 import random
 import itertools
+import warnings
+
+import numpy as np
 
 from hypothesis import given
 from hypothesis.strategies import integers, floats
@@ -18,18 +21,18 @@ class DnaTest(unittest.TestCase):
     def test_parse_code_str(self):
         given = [random.random() for _ in range(Gene.length())]
         actual = Dna.parse_dna(",".join([str(base) for base in given]))
-        self.assertListEqual(given, actual.code)
+        self.assertListEqual(given, actual.code.tolist())
 
     def test_parse_code_float(self):
         given = [random.random() for _ in range(Gene.length())]
         actual = Dna.parse_dna(given)
-        self.assertListEqual(given, actual.code)
+        self.assertListEqual(given, actual.code.tolist())
 
     @given(integers(Gene.length(), Gene.length() * 2))
     def test_parse_code_different_sizes(self, n):
         given = [random.random() for _ in range(n)]
         actual = Dna.parse_dna(given)
-        self.assertListEqual(given[:Gene.length()], actual.code[:Gene.length()])
+        self.assertListEqual(given[:Gene.length()], actual.code[:Gene.length()].tolist())
 
     @given(integers(1, 100), floats(0.51, 1))
     def test_parse_code_results_in_n_genes(self, n: int, expressability: float):
@@ -76,3 +79,61 @@ class DnaTest(unittest.TestCase):
         given = [random.random() for _ in range(Gene.length())]
         dna = Dna.parse_dna(given)
         self.assertEqual(",".join([str(base) for base in given]), str(dna))
+
+    @given(integers(Gene.length(), Gene.length() * 10))
+    def test_matrix_is_a_view_of_whole_genes(self, n):
+        dna = Dna.parse_dna([random.random() for _ in range(n)])
+        self.assertEqual((n // Gene.length(), Gene.length()), dna.matrix.shape)
+        self.assertTrue(np.shares_memory(dna.code, dna.matrix))
+        self.assertTrue(all([np.shares_memory(dna.code, gene.code) for gene in dna.genes]))
+
+    def test_column_has_the_base_of_every_gene(self):
+        dna = Dna.parse_dna([random.random() for _ in range(Gene.length() * 3)])
+        self.assertListEqual([gene.control_expression for gene in dna.genes], dna.column(Gene.CONTROL_EXPRESSION).tolist())
+
+    def test_code_is_read_only(self):
+        dna = Dna.parse_dna([random.random() for _ in range(Gene.length())])
+        with self.assertRaises(ValueError):
+            dna.code[0] = 0.5
+
+    def test_equal_and_same_hash_when_same_code(self):
+        given = [random.random() for _ in range(Gene.length() * 2)]
+        self.assertEqual(Dna.parse_dna(given), Dna.parse_dna(list(given)))
+        self.assertEqual(hash(Dna.parse_dna(given)), hash(Dna.parse_dna(list(given))))
+        self.assertNotEqual(Dna.parse_dna(given), Dna.parse_dna(given[::-1]))
+
+    @given(integers(1, 20))
+    def test_parse_many_is_the_same_as_parsing_each(self, n):
+        lines = [",".join([str(random.random()) for _ in range(Gene.length() * random.randint(1, 5))]) for _ in range(n)]
+        self.assertListEqual([Dna.parse_dna(line) for line in lines], Dna.parse_many(line + "\n" for line in lines))
+
+    def test_split_many_copies_the_bases_once(self):
+        codes = [np.random.random(Gene.length() * n) for n in [1, 3, 2]]
+        bases = np.concatenate(codes)
+        dnas = Dna.split_many(bases, offsets=np.cumsum([0] + [len(code) for code in codes]))
+        self.assertListEqual([Dna.parse_dna(code) for code in codes], dnas)
+        bases[0] = 2.
+        self.assertNotEqual(2., dnas[0].code[0])
+        self.assertIs(dnas[0].code.base, dnas[2].code.base)
+
+    def test_parse_rejects_malformed_code(self):
+        with self.assertRaises(ValueError):
+            Dna.parse_dna(",".join(["0.5"] * Gene.length()) + ",abc")
+        with self.assertRaises(ValueError):
+            Dna.parse_many([",".join(["0.5"] * Gene.length()), "0.5,,0.5"])
+
+    def test_parse_does_not_rely_on_deprecated_numpy(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual(Gene.length(), len(Dna.parse_dna(",".join(["0.5"] * Gene.length())).code))
+            with self.assertRaises(ValueError):
+                Dna.parse_dna(",".join(["0.5"] * Gene.length()) + ",")
+
+    def test_format_code_parses_back_exactly(self):
+        given = [random.random() * 10 ** random.randint(-8, 8) for _ in range(Gene.length() * 3)]
+        self.assertListEqual(given, Dna.parse_dna(Dna.format_code(given)).code.tolist())
+
+    def test_bytes_parse_back_exactly(self):
+        dna = Dna.parse_dna([random.random() for _ in range(Gene.length() * 3)])
+        self.assertEqual(8 * len(dna.code), len(dna.to_bytes()))
+        self.assertEqual(dna, Dna.from_bytes(dna.to_bytes()))
@@ -1,13 +1,17 @@
 import unittest
 from unittest.mock import patch
 
+import math
 import random
+import statistics
 
 from hyperparams import Hyperparams
-from evolution import Evolver
-from population import Population
+from evolution import Evolver, EvolutionMetrics, EvolutionRecord
+from population import Population, PopulationColumns
 from creature import Creature
 from dna import Dna
+from gene import Gene
+import fixtures
 
 
 class EvolutionTest(unittest.TestCase):
@@ -22,6 +26,8 @@ class EvolutionTest(unittest.TestCase):
         self.mock_hyperparams = patch("evolution.Hyperparams").start()
         self.mock_hyperparams.population_size = 100
         self.mock_hyperparams.expression_threshold = 0.5
+        self.mock_hyperparams.seed = None
+        self.mock_hyperparams.selection_strategy = "roulette"
 
         self.mock_simulation = patch("evolution.Simulation").start()
         self.mock_population = patch("evolution.Population").start()
@@ -30,8 +36,10 @@ class EvolutionTest(unittest.TestCase):
         self.mock_population.populate_for.return_value.fittest = self.elite_previous
         self.mock_population.populate_for.return_value = Population(creatures=self.viable_creatures)
         self.mock_population.return_value.creatures = self.viable_creatures
+        self.mock_population.return_value.columns = PopulationColumns.from_creatures(self.viable_creatures)
         self.mock_population.return_value.fittest = self.elite_offspring
         self.mock_reproduction.return_value.reproduce.return_value = self.dna_pool[-1]
+        self.mock_reproduction.return_value.reproduce_all.side_effect = lambda parents: [self.dna_pool[-1] for _ in parents]
 
         self.evolver = Evolver(hyperparams=self.mock_hyperparams)
 
@@ -53,3 +61,64 @@ class EvolutionTest(unittest.TestCase):
 
     def test_evolve_produces_elite_offspring(self):
         self.assertEqual(str(self.elite_offspring.dna), self.evolver.evolve(generation_id=0).elite_offspring.dna_code)
+
+    def test_evolve_population_keeps_simulation_open_across_generations(self):
+        patch("evolution.EvolutionMetrics").start()
+        with self.evolver as evolver:
+            _, offspring = evolver.evolve_population(generation_id=0)
+            generation, _ = evolver.evolve_population(generation_id=1, previous=Population(creatures=self.viable_creatures))
+        self.assertIs(self.mock_population.return_value, offspring)
+        self.assertEqual(1, generation.generation_id)
+        self.assertEqual(1, self.mock_simulation.call_count)
+        self.assertEqual(1, self.mock_simulation.return_value.__exit__.call_count)
+        self.assertIsNone(self.evolver.simulation)
+
+
+class EvolutionMetricsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rnd = random.Random(42)
+        self.hyperparams = fixtures.create_hyperparams(expression_threshold=0.5)
+        creatures = []
+        for i in range(20):
+            dna_code = [rnd.random() for _ in range(Gene.length() * rnd.randint(1, 4) + rnd.randint(0, 5))] + [1.] * Gene.length()
+            creature = Creature.develop_from(dna=Dna.parse_dna(dna_code), threshold_for_expression=0.5)
+            creature.movement.track((rnd.random(), rnd.random(), 5.))
+            creature.movement.lethal_move = i % 7 == 0
+            creatures.append(creature)
+        creatures.append(creatures[3])
+        creatures.append(Creature.develop_from(dna=creatures[4].dna, threshold_for_expression=0.5))
+        self.population = Population(creatures)
+        self.is_elite_from_previous = [i == 1 for i in range(len(self.population.creatures))]
+        self.records = sorted([
+            EvolutionRecord.from_creature(creature, is_previous_fittest=is_elite)
+            for creature, is_elite
+            in zip(self.population.creatures, self.is_elite_from_previous)], key=lambda r: r.fitness_score, reverse=True)
+
+    def test_from_population_is_the_same_as_from_records(self):
+        self.assertEqual(
+            EvolutionMetrics.from_records(self.records, hyperparams=self.hyperparams),
+            EvolutionMetrics.from_population(self.population, self.is_elite_from_previous, hyperparams=self.hyperparams))
+
+    def test_from_population_statistics(self):
+        metrics = EvolutionMetrics.from_population(self.population, self.is_elite_from_previous, hyperparams=self.hyperparams)
+        scores = [r.fitness_score for r in self.records if not r.is_elite_from_previous and not r.died_during_motion]
+        dna_all = [Dna.parse_dna(r.dna_code) for r in self.records]
+        self.assertAlmostEqual(statistics.mean(scores), metrics.fitness_mean)
+        self.assertAlmostEqual(statistics.stdev(scores), metrics.fitness_stdev)
+        self.assertAlmostEqual(min(scores), metrics.fitness_lowest)
+        self.assertAlmostEqual(max(scores), metrics.fitness_highest)
+        self.assertEqual(21, metrics.dna_count_all)
+        self.assertEqual(20, metrics.dna_count_unique)
+        self.assertEqual(sum(len(dna.genes) for dna in dna_all), metrics.genes_total)
+        self.assertEqual(sum(len(dna.code) % Gene.length() for dna in dna_all), metrics.bases_not_in_genes)
+        self.assertEqual(sum(1 for dna in dna_all for gene in dna.genes if gene.control_expression >= 0.5), metrics.genes_expressed)
+        self.assertEqual(metrics.genes_total, metrics.genes_expressed + metrics.genes_supressed)
+        self.assertEqual(3, metrics.creatures_dead)
+        self.assertEqual(18, metrics.creatures_survived)
+
+    def test_statistics_of_no_scores_are_nan(self):
+        metrics = EvolutionMetrics.from_population(self.population, [True] * len(self.population.creatures), hyperparams=self.hyperparams)
+        self.assertTrue(math.isnan(metrics.fitness_mean))
+        self.assertTrue(math.isnan(metrics.fitness_stdev))
+        self.assertEqual(21, metrics.dna_count_all)
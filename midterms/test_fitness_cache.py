@@ -0,0 +1,72 @@
+import unittest
+
+import tempfile
+from pathlib import Path
+
+from fitness_cache import FitnessCache
+import fixtures
+
+
+class FitnessCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.hyperparams = fixtures.create_hyperparams()
+        self.creature = fixtures.create_creature()
+        self.creature.movement.track((0.1, 0.2, 4.9))
+
+    def test_class_exists(self):
+        self.assertIsNotNone(FitnessCache)
+
+    def test_restore_misses_dna_never_stored(self):
+        cache = FitnessCache(self.hyperparams)
+        self.assertFalse(cache.restore(fixtures.create_creature()))
+        self.assertEqual(1, cache.misses)
+
+    def test_restore_hits_dna_stored_before(self):
+        cache = FitnessCache(self.hyperparams)
+        cache.store(self.creature)
+        twin = fixtures.create_creature()
+        object.__setattr__(twin, "dna", self.creature.dna)
+        self.assertTrue(cache.restore(twin))
+        self.assertEqual(self.creature.movement.last, twin.movement.last)
+        self.assertEqual(self.creature.movement.distance, twin.movement.distance)
+
+    def test_key_changes_with_simulation_hyperparams(self):
+        other = FitnessCache(fixtures.create_hyperparams(simulation_steps=11))
+        self.assertNotEqual(FitnessCache(self.hyperparams).key(self.creature.dna.code), other.key(self.creature.dna.code))
+
+    def test_key_ignores_reproduction_hyperparams(self):
+        other = FitnessCache(fixtures.create_hyperparams(point_mutation_rate=0.5))
+        self.assertEqual(FitnessCache(self.hyperparams).key(self.creature.dna.code), other.key(self.creature.dna.code))
+
+    def test_key_ignores_telemetry_hyperparams(self):
+        other = FitnessCache(fixtures.create_hyperparams(simulation_telemetry_interval=5, simulation_telemetry_samples=10))
+        self.assertEqual(FitnessCache(self.hyperparams).key(self.creature.dna.code), other.key(self.creature.dna.code))
+
+    def test_stores_but_does_not_restore_while_recording_telemetry(self):
+        cache = FitnessCache(fixtures.create_hyperparams(simulation_telemetry_interval=5))
+        cache.store(self.creature)
+        self.assertFalse(cache.restore(self.creature))
+        self.assertTrue(FitnessCache(self.hyperparams).key(self.creature.dna.code) in cache.memory)
+
+    def test_memory_evicts_least_recently_used(self):
+        cache = FitnessCache(self.hyperparams, capacity=2)
+        creatures = [fixtures.create_creature() for _ in range(3)]
+        for creature in creatures:
+            cache.store(creature)
+        self.assertFalse(cache.restore(creatures[0]))
+        self.assertTrue(cache.restore(creatures[2]))
+
+    def test_disk_keeps_entries_across_instances(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with FitnessCache(self.hyperparams, folder=Path(folder)) as cache:
+                cache.store(self.creature)
+            with FitnessCache(self.hyperparams, folder=Path(folder)) as cache:
+                self.creature.movement.reset()
+                self.assertTrue(cache.restore(self.creature))
+                self.assertEqual((0.1, 0.2, 4.9), self.creature.movement.last)
+
+    def test_disabled_when_stopping_hopeless_creatures(self):
+        cache = FitnessCache(fixtures.create_hyperparams(simulation_stop_hopeless=True))
+        cache.store(self.creature)
+        self.assertFalse(cache.restore(self.creature))
@@ -7,3 +7,9 @@ class GeneTest(unittest.TestCase):
 
     def test_gene_len(self):
         self.assertEqual(18, Gene.length())
+
+    def test_properties_read_their_column(self):
+        gene = Gene.create_from([i / Gene.length() for i in range(Gene.length())])
+        self.assertEqual(gene.code[Gene.LINK_SHAPE], gene.link_shape)
+        self.assertEqual(gene.code[Gene.JOINT_ORIGIN_XYZ_Z], gene.joint_origin_xyz_z)
+        self.assertEqual(gene.code[Gene.CONTROL_EXPRESSION], gene.control_expression)
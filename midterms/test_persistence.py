@@ -0,0 +1,265 @@
+import unittest
+from unittest.mock import patch
+
+import random
+import tempfile
+from pathlib import Path
+
+import dataclasses
+from dataclasses import fields
+
+import numpy as np
+
+from dna import Dna
+from evolution import EvolutionGeneration, EvolutionMetrics, EvolutionRecord
+from persistence import DnaRepository, EvolutionRepository, PersistenceSettings, PersistenceWriter
+import fixtures
+
+
+class EvolutionRepositoryTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(42)
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = Path(folder.name)
+        self.generation = EvolutionRepositoryTest.create_generation()
+
+    @staticmethod
+    def create_generation() -> EvolutionGeneration:
+        creatures = [fixtures.create_creature() for _ in range(5)]
+        for i, creature in enumerate(creatures):
+            creature.movement.track((0.1 * i, 0.2, 5.))
+        creatures[-1].movement.lethal_move = True
+        records = [EvolutionRecord.from_creature(c, is_previous_fittest=(i == 0)) for i, c in enumerate(creatures)]
+        return EvolutionGeneration(
+            generation_id=3,
+            hyperparams=fixtures.create_hyperparams(),
+            metrics=EvolutionMetrics(**{field.name: 1 for field in fields(EvolutionMetrics)}),
+            elite_previous=records[0],
+            elite_offspring=records[3],
+            offspring_fitness=records)
+
+    def create_repository(self, storage_format: str) -> EvolutionRepository:
+        return EvolutionRepository(settings=PersistenceSettings(folder=self.folder, storage_format=storage_format))
+
+    def test_class_exists(self):
+        self.assertIsNotNone(EvolutionRepository)
+
+    def test_json_round_trip(self):
+        repository = self.create_repository("json")
+        repository.write(self.generation)
+        self.assertTrue(repository.filepath_generation(3).is_file())
+        self.assertEqual(self.generation, repository.read(3))
+
+    def test_columns_round_trip(self):
+        repository = self.create_repository("npz")
+        repository.write(self.generation)
+        self.assertTrue(repository.filepath_generation_columns(3).is_file())
+        self.assertFalse(repository.filepath_generation(3).is_file())
+        self.assertEqual(self.generation, repository.read(3))
+
+    def test_columns_are_smaller_than_json(self):
+        self.create_repository("json").write(self.generation)
+        self.create_repository("npz").write(self.generation)
+        json_size = self.create_repository("json").filepath_generation(3).stat().st_size
+        npz_size = self.create_repository("npz").filepath_generation_columns(3).stat().st_size
+        self.assertLess(npz_size, json_size)
+
+    def test_read_columns_loads_dna_only_when_accessed(self):
+        repository = self.create_repository("npz")
+        repository.write(self.generation)
+        with repository.read_columns(3) as columns:
+            self.assertListEqual([r.fitness_score for r in self.generation.offspring_fitness], columns.fitness_score.tolist())
+            self.assertNotIn("dna_bases", columns.loaded)
+            self.assertEqual(self.generation.offspring_fitness[1].dna_code, ','.join(map(repr, columns.dna_code_of(1).tolist())))
+            self.assertIn("dna_bases", columns.loaded)
+
+    def test_append_summary_matches_summarise(self):
+        generations = [dataclasses.replace(self.generation, generation_id=i, elite_previous=None if i == 1 else self.generation.elite_previous) for i in range(1, 4)]
+        repository = self.create_repository("json")
+        repository.summarise(generations)
+        summarised = repository.filepath_summary().read_text()
+        repository.filepath_summary().unlink()
+        self.assertIsNone(repository.read_summary_tail())
+        for generation in generations:
+            self.assertTrue(repository.append_summary(generation))
+        self.assertEqual(summarised, repository.filepath_summary().read_text())
+        self.assertEqual('3', repository.read_summary_tail()['generation_id'])
+
+    def test_append_summary_resumes_after_the_last_generation(self):
+        repository = self.create_repository("json")
+        repository.append_summary(self.generation)
+        self.assertFalse(repository.append_summary(self.generation))
+        self.assertTrue(repository.append_summary(dataclasses.replace(self.generation, generation_id=4)))
+        self.assertEqual(3, len(repository.filepath_summary().read_text().splitlines()))
+        self.assertEqual('4', repository.read_summary_tail()['generation_id'])
+
+    def test_the_configured_format_is_read_first(self):
+        self.create_repository("npz").write(self.generation)
+        generation = dataclasses.replace(self.generation, offspring_fitness=self.generation.offspring_fitness[:2])
+        self.create_repository("json").write(generation)
+        for storage_format, expected in [("json", generation), ("npz", self.generation)]:
+            repository = self.create_repository(storage_format)
+            self.assertEqual(storage_format, repository.stored_format(3))
+            self.assertEqual(expected, repository.read(3))
+            survivors = [r for r in expected.offspring_fitness if not r.died_during_motion]
+            self.assertEqual(len(survivors), len(repository.read_genesis(3)[1].creatures))
+
+    def test_the_other_format_is_read_when_the_configured_one_is_missing(self):
+        self.create_repository("json").write(self.generation)
+        repository = self.create_repository("npz")
+        self.assertEqual("json", repository.stored_format(3))
+        self.assertEqual(self.generation, repository.read(3))
+        self.assertIsNone(repository.stored_format(4))
+
+    def test_untracked_last_position_round_trips(self):
+        untracked = dataclasses.replace(self.generation.offspring_fitness[0], last_position=EvolutionRecord.UNTRACKED_POSITION)
+        generation = dataclasses.replace(self.generation, offspring_fitness=[untracked] + self.generation.offspring_fitness[1:])
+        repository = self.create_repository("npz")
+        repository.write(generation)
+        self.assertEqual(generation, repository.read(3))
+
+    def test_read_columns_none_when_stored_as_json(self):
+        repository = self.create_repository("json")
+        repository.write(self.generation)
+        self.assertIsNone(repository.read_columns(3))
+        self.assertIsNone(repository.read(4))
+
+    def test_read_genesis_is_the_same_from_columns_and_json(self):
+        self.create_repository("json").write(self.generation)
+        self.create_repository("npz").write(self.generation)
+        hyperparams_npz, population_npz = self.create_repository("npz").read_genesis(3)
+        self.create_repository("npz").filepath_generation_columns(3).unlink()
+        hyperparams_json, population_json = self.create_repository("json").read_genesis(3)
+        self.assertEqual(hyperparams_json, hyperparams_npz)
+        self.assertListEqual([c.dna for c in population_json.creatures], [c.dna for c in population_npz.creatures])
+        self.assertListEqual([c.movement for c in population_json.creatures], [c.movement for c in population_npz.creatures])
+
+
+class DnaRepositoryTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(42)
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.repository = DnaRepository(settings=PersistenceSettings(folder=Path(folder.name)))
+        self.dna_codes = [[random.random() for _ in range(36)] for _ in range(5)]
+
+    def test_write_many_appends_in_order(self):
+        self.repository.write("species", self.dna_codes[0])
+        self.repository.write_many("species", self.dna_codes[1:])
+        for i, dna_code in enumerate(self.dna_codes):
+            self.assertListEqual(dna_code, self.repository.read("species", individual=i).code.tolist())
+        self.assertListEqual(self.dna_codes[-1], self.repository.read("species").code.tolist())
+
+    def test_write_many_overrides(self):
+        self.repository.write_many("species", self.dna_codes)
+        self.repository.write_many("species", self.dna_codes[:1], override=True)
+        self.assertListEqual(self.dna_codes[0], self.repository.read("species").code.tolist())
+        self.assertEqual(1, self.repository.count("species"))
+
+    def test_index_ends_with_the_size_of_the_file(self):
+        self.repository.write_many("species", self.dna_codes[:2])
+        self.repository.write("species", self.dna_codes[2])
+        offsets = np.fromfile(self.repository.filepath_index("species"), dtype=DnaRepository.INDEX_DTYPE)
+        self.assertEqual(4, len(offsets))
+        self.assertEqual(0, offsets[0])
+        self.assertEqual(self.repository.filepath("species").stat().st_size, offsets[-1])
+
+    def test_index_is_rebuilt_for_files_without_it(self):
+        self.repository.write_many("species", self.dna_codes)
+        self.repository.filepath_index("species").unlink()
+        with open(self.repository.filepath("species"), 'a', encoding='utf-8') as fh:
+            fh.write(f"{Dna.format_code(self.dna_codes[0])}\n")
+        self.assertEqual(len(self.dna_codes) + 1, self.repository.count("species"))
+        self.assertListEqual(self.dna_codes[2], self.repository.read("species", individual=2).code.tolist())
+        self.assertListEqual(self.dna_codes[0], self.repository.read("species").code.tolist())
+
+    def test_read_out_of_range_or_missing(self):
+        self.assertIsNone(self.repository.read("species"))
+        self.repository.write_many("species", self.dna_codes)
+        self.assertIsNone(self.repository.read("species", individual=len(self.dna_codes)))
+
+    def test_dedup_keeps_the_first_of_each(self):
+        self.repository.write_many("species", self.dna_codes + self.dna_codes[::-1] + self.dna_codes[:1])
+        self.repository.dedup("species")
+        self.assertListEqual(self.dna_codes, [dna.code.tolist() for dna in self.repository.read_all("species")])
+        self.assertEqual(len(self.dna_codes), self.repository.count("species"))
+        self.assertListEqual(self.dna_codes[-1], self.repository.read("species").code.tolist())
+        self.assertListEqual(["species.dna", "species.dna.idx"], sorted(f.name for f in self.repository.settings.folder.iterdir()))
+
+    def test_dedup_skips_blank_lines(self):
+        with open(self.repository.filepath("species"), 'w', encoding='utf-8') as fh:
+            fh.write(f"\n{Dna.format_code(self.dna_codes[0])}\n\n{Dna.format_code(self.dna_codes[1])}\n\n")
+        self.repository.dedup("species")
+        self.assertEqual(2, self.repository.count("species"))
+        self.assertListEqual(self.dna_codes[1], self.repository.read("species", individual=1).code.tolist())
+
+    def test_dedup_removes_temporary_files_when_it_fails(self):
+        self.repository.write_many("species", self.dna_codes + self.dna_codes)
+        with patch("persistence.os.replace", side_effect=OSError("disk full")), self.assertRaises(OSError):
+            self.repository.dedup("species")
+        self.assertListEqual(["species.dna", "species.dna.idx"], sorted(f.name for f in self.repository.settings.folder.iterdir()))
+        self.assertEqual(2 * len(self.dna_codes), self.repository.count("species"))
+
+    def test_write_unique_skips_dna_already_written(self):
+        self.repository.write_many("species", self.dna_codes[:3])
+        repository = DnaRepository(settings=self.repository.settings)
+        repository.write_many("species", self.dna_codes[1:] + self.dna_codes[-1:], unique=True)
+        repository.write("species", self.dna_codes[0], unique=True)
+        self.assertListEqual(self.dna_codes, [dna.code.tolist() for dna in repository.read_all("species")])
+
+    def test_write_unique_override_keeps_dna_of_the_old_file(self):
+        self.repository.write_many("species", self.dna_codes[:2])
+        self.repository.write_many("species", self.dna_codes + self.dna_codes[:1], override=True, unique=True)
+        self.assertListEqual(self.dna_codes, [dna.code.tolist() for dna in self.repository.read_all("species")])
+        self.assertEqual(len(self.dna_codes), self.repository.count("species"))
+
+    def test_read_all_streams_every_individual(self):
+        self.repository.write_many("species", self.dna_codes)
+        self.assertListEqual(self.dna_codes, [dna.code.tolist() for dna in self.repository.read_all("species", batch_size=2)])
+        self.assertListEqual([], list(self.repository.read_all("missing")))
+
+
+class PersistenceWriterTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(42)
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        settings = PersistenceSettings(folder=Path(folder.name), storage_format="npz")
+        self.evolution_repository = EvolutionRepository(settings=settings)
+        self.dna_repository = DnaRepository(settings=settings)
+        self.dna_codes = [[random.random() for _ in range(36)] for _ in range(50)]
+
+    def create_writer(self, queue_size: int = 8) -> PersistenceWriter:
+        return PersistenceWriter(self.evolution_repository, self.dna_repository, queue_size=queue_size)
+
+    def test_everything_is_written_in_order_on_close(self):
+        generation = EvolutionRepositoryTest.create_generation()
+        with self.create_writer(queue_size=2) as writer:
+            writer.write_generation(generation)
+            writer.write_summary(generation)
+            for dna_code in self.dna_codes:
+                writer.write_dna("summary", dna_code)
+        self.assertEqual(generation, self.evolution_repository.read(generation.generation_id))
+        self.assertEqual(str(generation.generation_id), self.evolution_repository.read_summary_tail()['generation_id'])
+        for i, dna_code in enumerate(self.dna_codes):
+            self.assertListEqual(dna_code, self.dna_repository.read("summary", individual=i).code.tolist())
+        self.assertEqual(len(self.dna_codes) + 2, writer.stats.submitted)
+        self.assertEqual(len(self.dna_codes) + 2, writer.stats.written)
+        self.assertLessEqual(writer.stats.queue_depth_max, 2)
+
+    def test_failures_are_raised_by_close(self):
+        self.dna_repository.filepath("summary").mkdir()
+        writer = self.create_writer()
+        writer.write_dna("summary", self.dna_codes[0])
+        with self.assertRaises(OSError):
+            writer.close()
+
+    def test_writing_after_close_fails(self):
+        writer = self.create_writer()
+        writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.write_dna("summary", self.dna_codes[0])
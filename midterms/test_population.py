@@ -4,6 +4,8 @@ from unittest.mock import patch, Mock
 
 import random
 
+import numpy as np
+
 from population import Population
 
 
@@ -43,3 +45,61 @@ class PopulationTest(unittest.TestCase):
         self.assertTrue(all([c.movement.last is None for c in self.population.creatures]))
         for i in range(len(fm) - 3):
             self.assertAlmostEqual(fm[i+2]-fm[i+1], fm[i+1]-fm[i+0])
+
+    def test_sample_pairs_returns_k_pairs_of_creature_indices(self):
+        pairs = self.population.sample_pairs(50, rng=np.random.default_rng(42))
+        self.assertEqual((50, 2), pairs.shape)
+        self.assertTrue(all([0 <= i < len(self.population.creatures) for i in pairs.flatten()]))
+
+    def test_sample_pairs_never_selects_lethal_creatures(self):
+        for creature in self.population.creatures[1:]:
+            creature.movement.lethal_move = True
+        pairs = self.population.sample_pairs(20, rng=np.random.default_rng(42))
+        self.assertTrue(all([i == 0 for i in pairs.flatten()]))
+
+    def test_sample_pairs_returns_no_pairs_when_all_creatures_are_lethal(self):
+        for creature in self.population.creatures:
+            creature.movement.lethal_move = True
+        self.assertEqual(0, len(self.population.sample_pairs(10)))
+        self.assertEqual((None, None), self.population.next_roulette_pair())
+
+    def test_sample_pairs_never_selects_creatures_that_did_not_move(self):
+        for i, creature in enumerate(self.population.creatures):
+            creature.movement.track((0., 0.5, 5.) if i == 0 else (0., 0., 5.))
+        pairs = self.population.sample_pairs(100, rng=np.random.default_rng(42))
+        self.assertTrue(all([i == 0 for i in pairs.flatten()]))
+
+    def test_creatures_are_deduplicated_by_identity_keeping_order(self):
+        creatures = self.population.creatures[:3]
+        population = Population(creatures + creatures[::-1])
+        self.assertListEqual(creatures, population.creatures)
+
+    def test_columns_have_one_entry_per_creature(self):
+        columns = self.population.columns
+        self.assertEqual(self.population_size, len(columns.fitness))
+        self.assertEqual(self.population_size, len(columns.lethal))
+        self.assertEqual(self.population_size, len(set(columns.ids.tolist())))
+        for i, creature in enumerate(self.population.creatures):
+            self.assertListEqual(creature.dna.code.tolist(), columns.dna_code_of(i).tolist())
+
+    def test_refresh_keeps_the_dna_columns(self):
+        creature = self.population.creatures[5]
+        columns = self.population.columns
+        creature.movement.track((0.5, 0., 5.))
+        self.assertIs(columns, self.population.columns)
+        self.population.refresh()
+        self.assertIs(creature, self.population.fittest)
+        self.assertEqual(0.5, self.population.columns.fitness[5])
+        self.assertIs(columns.dna_bases, self.population.columns.dna_bases)
+        creature.movement.lethal_move = True
+        self.population.refresh()
+        self.assertTrue(self.population.columns.lethal[5])
+        self.assertIsNot(creature, self.population.fittest)
+
+    def test_refresh_rebuilds_columns_after_creatures_move(self):
+        creature = self.population.creatures[-1]
+        self.assertIsNone(self.population.fittest.movement.last)
+        creature.movement.track((0., 0.5, 5.))
+        self.population.refresh()
+        self.assertEqual(0.5, self.population.columns.fitness[-1])
+        self.assertEqual(creature, self.population.fittest)
@@ -6,6 +6,8 @@ from hypothesis.strategies import integers
 
 import random
 
+import numpy as np
+
 from hyperparams import Hyperparams
 from reproduction import Reproduction
 from gene import Gene
@@ -98,4 +100,25 @@ class ReproductionTest(unittest.TestCase):
         before = [random.random() for _ in range(Gene.length() * random.randint(1, 15))]
         after = self.reproduction._mutate_grow(before)
         self.assertEqual(len(after), len(before))
-        
\ No newline at end of file
+        
+    def test_reproduce_all_produces_one_child_per_pair(self):
+        self.mock_hyperparams.grow_mutation_rate = 0.1
+        self.mock_hyperparams.gene_count_max = 15
+        children = self.reproduction.reproduce_all([(self.adam, self.eve), (self.eve, self.adam), (self.adam, self.adam)])
+        self.assertEqual(3, len(children))
+        self.assertTrue(all([Gene.length() <= len(child) <= 15 * Gene.length() for child in children]))
+
+    def test_shrink_mutation_never_removes_more_than_gen_len_from_each_child(self):
+        self.mock_hyperparams.shrink_mutation_rate = 1.
+        lengths = [Gene.length() * n for n in (1, 5, 15)]
+        bases = [random.random() for _ in range(sum(lengths))]
+        offsets = Reproduction._offsets_from(np.array(lengths))
+        _, after = self.reproduction._mutate_shrink_all(np.array(bases), offsets)
+        self.assertListEqual([Gene.length()] * 3, np.diff(after).tolist())
+
+    def test_reproduce_is_deterministic_for_the_same_seed(self):
+        self.mock_hyperparams.grow_mutation_rate = 0.1
+        self.mock_hyperparams.gene_count_max = 15
+        first = Reproduction(self.mock_hyperparams, rng=np.random.default_rng(42)).reproduce(self.adam, self.eve)
+        second = Reproduction(self.mock_hyperparams, rng=np.random.default_rng(42)).reproduce(self.adam, self.eve)
+        self.assertListEqual(first, second)
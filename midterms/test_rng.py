@@ -0,0 +1,39 @@
+import unittest
+
+from hypothesis import given
+from hypothesis.strategies import integers
+
+from rng import RandomStreams
+from primordial_soup import PrimordialSoup
+
+
+class RandomStreamsTest(unittest.TestCase):
+
+    def test_class_exists(self):
+        self.assertIsNotNone(RandomStreams)
+
+    @given(integers(0, 2**32), integers(0, 1000))
+    def test_same_seed_and_generation_draw_the_same_numbers(self, seed, generation_id):
+        first = RandomStreams(seed).for_generation(generation_id)
+        second = RandomStreams(seed).for_generation(generation_id)
+        self.assertListEqual(first.reproduction.random(10).tolist(), second.reproduction.random(10).tolist())
+        self.assertListEqual(first.selection.random(10).tolist(), second.selection.random(10).tolist())
+
+    def test_generations_draw_independent_numbers(self):
+        streams = RandomStreams(42)
+        self.assertNotEqual(streams.for_generation(0).reproduction.random(), streams.for_generation(1).reproduction.random())
+
+    def test_streams_of_a_generation_are_independent_from_each_other(self):
+        streams = RandomStreams(42).for_generation(0)
+        self.assertNotEqual(streams.selection.random(), streams.reproduction.random())
+
+    def test_generation_streams_do_not_depend_on_previous_generations(self):
+        streams = RandomStreams(42)
+        streams.for_generation(0).reproduction.random(1000)
+        self.assertEqual(RandomStreams(42).for_generation(1).reproduction.random(), streams.for_generation(1).reproduction.random())
+
+    def test_unseeded_streams_can_be_reproduced_from_entropy(self):
+        streams = RandomStreams()
+        self.assertEqual(
+            PrimordialSoup.spark_life(3, rng=streams.for_creature()),
+            PrimordialSoup.spark_life(3, rng=RandomStreams(streams.entropy).for_creature()))
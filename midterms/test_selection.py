@@ -0,0 +1,68 @@
+import unittest
+
+from hypothesis import given
+from hypothesis.strategies import sampled_from, integers
+
+import numpy as np
+
+from selection import (
+    SelectionStrategy,
+    RouletteSelection,
+    StochasticUniversalSampling,
+    TournamentSelection,
+    RankSelection,
+    TruncationSelection)
+import fixtures
+
+
+class SelectionStrategyTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(42)
+        self.fitness = np.array([0., 1., 2., 3., 4., 5., 6., 7., 8., 9.])
+
+    def test_class_exists(self):
+        self.assertIsNotNone(SelectionStrategy)
+
+    @given(sampled_from(SelectionStrategy.names()))
+    def test_from_hyperparams_resolves_every_strategy(self, name):
+        hyperparams = fixtures.create_hyperparams(selection_strategy=name)
+        self.assertIsInstance(SelectionStrategy.from_hyperparams(hyperparams), SelectionStrategy)
+
+    def test_from_hyperparams_rejects_unknown_strategies(self):
+        hyperparams = fixtures.create_hyperparams(selection_strategy="lottery")
+        with self.assertRaises(ValueError):
+            SelectionStrategy.from_hyperparams(hyperparams)
+
+    @given(sampled_from(SelectionStrategy.names()), integers(1, 200))
+    def test_select_returns_n_valid_indices(self, name, n):
+        strategy = SelectionStrategy.from_hyperparams(fixtures.create_hyperparams(selection_strategy=name))
+        selected = strategy.select(self.fitness, n, self.rng)
+        self.assertEqual(n, len(selected))
+        self.assertTrue(all([0 <= i < len(self.fitness) for i in selected]))
+
+    def test_fitness_map_is_uniform_when_no_fitness(self):
+        self.assertListEqual([0.25, 0.5, 0.75, 1.], SelectionStrategy.fitness_map(np.zeros(4)).tolist())
+
+    def test_roulette_never_selects_candidates_without_fitness(self):
+        selected = RouletteSelection().select(self.fitness, 1000, self.rng)
+        self.assertNotIn(0, selected)
+
+    def test_sus_selects_each_candidate_close_to_its_expected_count(self):
+        selected = StochasticUniversalSampling().select(self.fitness, 45, self.rng)
+        counts = np.bincount(selected, minlength=len(self.fitness))
+        self.assertListEqual(self.fitness.astype(int).tolist(), counts.tolist())
+
+    def test_tournament_of_all_candidates_selects_the_fittest(self):
+        selected = TournamentSelection(size=1000).select(self.fitness, 10, self.rng)
+        self.assertTrue(all([i == 9 for i in selected]))
+
+    def test_rank_selection_ignores_the_scale_of_fitness(self):
+        skewed = np.array([0., 1., 2., 3., 4., 5., 6., 7., 8., 1e9])
+        first = RankSelection().select(self.fitness, 100, np.random.default_rng(0))
+        second = RankSelection().select(skewed, 100, np.random.default_rng(0))
+        self.assertListEqual(first.tolist(), second.tolist())
+
+    def test_truncation_only_selects_the_fittest_ratio(self):
+        selected = TruncationSelection(ratio=0.3).select(self.fitness, 100, self.rng)
+        self.assertSetEqual({7, 8, 9}, set(selected.tolist()))
@@ -0,0 +1,186 @@
+from typing import Optional
+
+import unittest
+
+import random
+
+import pybullet as p
+from numpy import pi
+
+from simulation import Simulation, SimulationPool, SimulationRunner, SimulatorSetup
+from creature_builder import CreatureBuilder
+from phenotype import PhenotypeJointType
+from creature import Creature
+import fixtures
+
+
+class SimulationTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(42)
+        self.hyperparams = fixtures.create_hyperparams()
+        self.creatures = [fixtures.create_creature() for _ in range(3)]
+
+    def test_class_exists(self):
+        self.assertIsNotNone(Simulation)
+
+    def test_simulate_all_tracks_every_creature(self):
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            simulated = list(simulation.simulate_all(self.creatures, steps=10))
+        self.assertListEqual(self.creatures, simulated)
+        self.assertTrue(all([c.movement.last is not None for c in simulated]))
+
+    def test_telemetry_is_off_by_default(self):
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            list(simulation.simulate_all(self.creatures, steps=10))
+            self.assertListEqual([], simulation.drain_telemetry())
+
+    def test_telemetry_records_every_interval(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_telemetry_interval=3, simulation_stop_on_lethal=False)
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            list(simulation.simulate_all(self.creatures, steps=10))
+            traces = simulation.drain_telemetry()
+            self.assertListEqual([], simulation.drain_telemetry())
+        self.assertListEqual([c.name for c in self.creatures], [t.creature_name for t in traces])
+        for creature, trace in zip(self.creatures, traces):
+            self.assertListEqual([0, 3, 6, 9], trace.step.tolist())
+            self.assertEqual(len(creature.body.flatten()) - 1, trace.joint_count)
+            self.assertEqual(creature.movement.last, tuple(trace.base_position[-1].tolist()))
+
+    def test_pool_ships_telemetry_back_from_workers(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_telemetry_interval=5)
+        with SimulationPool(hyperparams=self.hyperparams, processes=2) as pool:
+            list(pool.simulate_all(self.creatures, steps=10))
+            traces = pool.drain_telemetry()
+        self.assertListEqual([c.name for c in self.creatures], [t.creature_name for t in traces])
+
+    def test_stop_hopeless_does_not_depend_on_simulation_order(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_stop_hopeless=True)
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            forward = [c.movement.last for c in simulation.simulate_all(self.creatures, steps=100, target_distance=0.5)]
+            backward = [c.movement.last for c in simulation.simulate_all(self.creatures[::-1], steps=100, target_distance=0.5)]
+        self.assertListEqual(forward, backward[::-1])
+
+    def test_offline_by_default_when_not_interactive(self):
+        self.assertTrue(Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams).is_offline)
+
+    def test_offline_simulation_is_deterministic_for_the_same_dna(self):
+        dna_code = self.creatures[0].dna.code
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            first = simulation.simulate(dna_code, steps=100).movement.distance
+            second = simulation.simulate(dna_code, steps=100).movement.distance
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            third = simulation.simulate(dna_code, steps=100).movement.distance
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+
+    def test_simulate_reuses_world_keeping_only_ground_and_last_creature(self):
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            for creature in self.creatures:
+                simulation.simulate(creature, steps=10)
+            self.assertEqual(2, p.getNumBodies(physicsClientId=simulation.pid))
+
+    def test_simulate_without_restoring_state_is_deterministic(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_restore_state=False)
+        dna_code = self.creatures[0].dna.code
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            first = simulation.simulate(dna_code, steps=100).movement.distance
+            simulation.simulate(self.creatures[1].dna.code, steps=100)
+            second = simulation.simulate(dna_code, steps=100).movement.distance
+        self.assertEqual(first, second)
+
+    def test_simulate_batch_moves_creatures_as_if_simulated_alone(self):
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            alone = [simulation.simulate(c.dna.code, steps=100).movement.last for c in self.creatures]
+            batched = [c.movement.last for c in simulation.simulate_batch([c.dna.code for c in self.creatures], steps=100)]
+        self.assertListEqual(alone, batched)
+
+    def test_simulate_all_in_batches_tracks_every_creature(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_batch_size=2)
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            simulated = list(simulation.simulate_all(self.creatures, steps=10))
+        self.assertListEqual(self.creatures, simulated)
+        self.assertTrue(all([c.movement.last is not None for c in simulated]))
+
+    def test_pool_simulate_all_restores_movement_in_order(self):
+        with SimulationPool(hyperparams=self.hyperparams, processes=2) as pool:
+            simulated = list(pool.simulate_all(self.creatures, steps=10))
+        self.assertListEqual(self.creatures, simulated)
+        self.assertTrue(all([c.movement.last is not None for c in simulated]))
+
+    def test_pool_simulate_all_in_batches_restores_movement_in_order(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_batch_size=2)
+        with SimulationPool(hyperparams=self.hyperparams, processes=2) as pool:
+            simulated = list(pool.simulate_all(self.creatures, steps=10))
+        self.assertListEqual(self.creatures, simulated)
+        self.assertTrue(all([c.movement.last is not None for c in simulated]))
+
+    def test_runner_resolves_one_motor_per_revolute_joint(self):
+        creature = self.creatures[0]
+        runner = self._create_runner(creature, steps=1)
+        revolute = [jid for jid, part in enumerate(creature.body.flatten()[1:]) if part.phenotype.joint_type == PhenotypeJointType.REVOLUTE]
+        self.assertListEqual(revolute, runner.motor_joint_indices)
+        self.assertEqual(len(revolute), len(runner.motors))
+
+    def test_runner_motors_keep_phase_across_steps(self):
+        creature = next(c for c in self.creatures if any(part.phenotype.joint_type == PhenotypeJointType.REVOLUTE for part in c.body.flatten()[1:]))
+        runner = self._create_runner(creature, steps=5)
+        runner.run()
+        for motor in runner.motors:
+            self.assertAlmostEqual((5 * motor.freq) % (2 * pi), motor.phase)
+
+    def test_runner_motors_only_update_on_motor_ticks(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_motor_interval=4)
+        creature = next(c for c in self.creatures if any(part.phenotype.joint_type == PhenotypeJointType.REVOLUTE for part in c.body.flatten()[1:]))
+        runner = self._create_runner(creature, steps=10)
+        runner.run()
+        for motor in runner.motors:
+            self.assertAlmostEqual((3 * motor.freq) % (2 * pi), motor.phase)
+
+    def test_runner_tracks_last_step_regardless_of_tracking_interval(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_tracking_interval=1000)
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            sampled = simulation.simulate(self.creatures[0].dna.code, steps=50).movement.last
+        self.hyperparams = fixtures.create_hyperparams()
+        with Simulation(connection_mode=p.DIRECT, hyperparams=self.hyperparams) as simulation:
+            tracked = simulation.simulate(self.creatures[0].dna.code, steps=50).movement.last
+        self.assertEqual(tracked, sampled)
+
+    def test_runner_stops_dead_creatures_early(self):
+        runner = self._create_runner(self.creatures[0], steps=10)
+        self.creatures[0].movement.lethal_move = True
+        self.assertTrue(runner._should_stop_early(step=0))
+
+    def test_runner_keeps_dead_creatures_when_stop_on_lethal_disabled(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_stop_on_lethal=False)
+        runner = self._create_runner(self.creatures[0], steps=10)
+        self.creatures[0].movement.lethal_move = True
+        self.assertFalse(runner._should_stop_early(step=0))
+
+    def test_runner_stops_stalled_creatures_after_stall_steps(self):
+        self.hyperparams = fixtures.create_hyperparams(simulation_stall_steps=5, simulation_stall_epsilon=0.01)
+        runner = self._create_runner(self.creatures[0], steps=100)
+        self.creatures[0].movement.track((0., 0., 4.5))
+        self.assertFalse(runner._should_stop_early(step=1))
+        self.creatures[0].movement.track((0., 0., 4.501))
+        self.assertFalse(runner._should_stop_early(step=4))
+        self.assertTrue(runner._should_stop_early(step=6))
+
+    def test_runner_stops_hopeless_creatures_only_when_enabled(self):
+        runner = self._create_runner(self.creatures[0], steps=10, target_distance=100.)
+        self.assertFalse(runner._should_stop_early(step=0))
+        self.hyperparams = fixtures.create_hyperparams(simulation_stop_hopeless=True)
+        runner = self._create_runner(self.creatures[0], steps=10, target_distance=100.)
+        self.assertTrue(runner._should_stop_early(step=0))
+        runner = self._create_runner(self.creatures[0], steps=1000, target_distance=100.)
+        self.assertFalse(runner._should_stop_early(step=0))
+
+    def _create_runner(self, creature: Creature, steps: int, target_distance: Optional[float] = None) -> SimulationRunner:
+        pid = p.connect(p.DIRECT)
+        self.addCleanup(p.disconnect, physicsClientId=pid)
+        SimulatorSetup(is_interactive=False, hyperparams=self.hyperparams, pid=pid).setup()
+        creature_id = CreatureBuilder(creature, pid=pid).build()
+        p.resetBasePositionAndOrientation(creature_id, list(creature.movement.reset()), [0, 0, 0, 1], physicsClientId=pid)
+        return SimulationRunner(
+            False, is_offline=True, hyperparams=self.hyperparams,
+            creature=creature, creature_id=creature_id, steps=steps, pid=pid, target_distance=target_distance)
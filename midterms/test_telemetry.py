@@ -0,0 +1,61 @@
+import unittest
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from telemetry import TelemetryRecorder, TelemetryTrace
+
+
+class TelemetryRecorderTest(unittest.TestCase):
+
+    @staticmethod
+    def record(recorder: TelemetryRecorder, steps: int):
+        for step in range(steps):
+            recorder.record(step, (step, 0., 5.), (0., 0., 0., 1.), [(step * 0.1, -step, 0., 0.)] * recorder.joint_count)
+
+    def test_keeps_every_sample_within_capacity(self):
+        recorder = TelemetryRecorder(capacity=10, joint_count=2)
+        TelemetryRecorderTest.record(recorder, 4)
+        trace = recorder.trace("creature")
+        self.assertEqual("creature", trace.creature_name)
+        self.assertListEqual([0, 1, 2, 3], trace.step.tolist())
+        self.assertListEqual([0., 1., 2., 3.], trace.base_position[:, 0].tolist())
+        self.assertListEqual([[0, -1, -2, -3]] * 2, trace.joint_velocity.T.tolist())
+        self.assertEqual(0, trace.dropped)
+
+    def test_keeps_the_most_recent_samples_beyond_capacity(self):
+        recorder = TelemetryRecorder(capacity=3, joint_count=1)
+        TelemetryRecorderTest.record(recorder, 8)
+        trace = recorder.trace("creature")
+        self.assertListEqual([5, 6, 7], trace.step.tolist())
+        self.assertListEqual([5., 6., 7.], trace.base_position[:, 0].tolist())
+        self.assertEqual(5, trace.dropped)
+
+    def test_traces_are_copies(self):
+        recorder = TelemetryRecorder(capacity=3, joint_count=1)
+        TelemetryRecorderTest.record(recorder, 2)
+        trace = recorder.trace("creature")
+        TelemetryRecorderTest.record(recorder, 3)
+        self.assertListEqual([0, 1], trace.step.tolist())
+
+
+class TelemetryTraceTest(unittest.TestCase):
+
+    def test_save_all_round_trip(self):
+        traces = []
+        for i, (steps, joint_count) in enumerate([(4, 2), (0, 1), (7, 0), (3, 5)]):
+            recorder = TelemetryRecorder(capacity=5, joint_count=joint_count)
+            TelemetryRecorderTest.record(recorder, steps)
+            traces.append(recorder.trace(f"creature-{i}"))
+        with tempfile.TemporaryDirectory() as folder:
+            filepath = Path(folder) / "telemetry.npz"
+            TelemetryTrace.save_all(filepath, traces)
+            loaded = TelemetryTrace.load_all(filepath)
+        self.assertEqual(len(traces), len(loaded))
+        for trace, other in zip(traces, loaded):
+            self.assertEqual(trace.creature_name, other.creature_name)
+            self.assertEqual(trace.dropped, other.dropped)
+            for name in ["step", "base_position", "base_orientation", "joint_position", "joint_velocity"]:
+                np.testing.assert_array_equal(getattr(trace, name), getattr(other, name))